@@ -0,0 +1,5 @@
+import numpy as np
+
+# Oscillation rates the flames of the cells can have. Using a limited number of rates allows the oscillation of all
+# the flames to be computed from a few values at each frame. They're in single precision, like the grid matrices.
+FLAME_OSCILLATION_RATES = np.linspace(0.1, 0.3, 32, dtype=np.float32)
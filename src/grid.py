@@ -0,0 +1,272 @@
+import numpy as np
+
+from src.cell import Cell
+from src.constants import FLAME_OSCILLATION_RATES
+from src.material import Material
+from src.physics import heat_conduction_tiled, interface_conductivities, active_region, update_ignition
+from src.physics import effective_ignition_temperatures, update_combustion, cell_geometry
+from src.physics import MIN_TEMP, MAX_TEMP
+from src.window_option import CELL_WIDTH_INIT, CELL_HEIGHT_INIT
+
+# Floating-point type of the physical property matrices. Single precision is more than enough for the simulation's
+# value ranges and halves the memory traffic of every whole-grid operation compared to NumPy's default float64.
+FLOAT_DTYPE = np.float32
+
+# Materials in the order of their index in the material matrix of the grid.
+MATERIALS = list(Material)
+
+# Probability of occurrence of each material in a cell.
+MATERIAL_PROBABILITIES = {
+    Material.GRASS : 0.40,
+    Material.WOOD : 0.35,
+    Material.WATER : 0.15,
+    Material.GASOLINE : 0.10,
+}
+
+# Physical properties of the materials for which a matrix is built.
+MATERIAL_PROPERTIES = ("thermal_conductivity", "thermal_capacity", "humidity", "ignition_temp", "burn_rate",
+                       "combustion_heat", "density")
+
+# Values of each property of MATERIAL_PROPERTIES for all the materials, indexed like MATERIALS. They are read from
+# the Material enum only once, at import, so that the properties of any cell are then obtained by indexing these
+# tables with its material index rather than through its Material member.
+MATERIAL_PROPERTY_TABLES = {name: np.array([getattr(material.value, name) for material in MATERIALS], dtype=FLOAT_DTYPE)
+                            for name in MATERIAL_PROPERTIES}
+
+# Each cell state is packed in a single byte: the 3 lowest bits hold the index of the cell's material in MATERIALS and
+# the next bits the burning and burned flags.
+STATE_BURNING = 1 << 3
+STATE_BURNED = 1 << 4
+STATE_COUNT = 1 << 5 # Number of possible states
+
+# The material indexes must fit in the bits below the burning flag.
+assert len(MATERIALS) <= STATE_BURNING, "Too many materials for the bits of the material index in the cell states"
+
+def draw_material_grid(shape) -> np.ndarray:
+    """
+    Randomly draws the material of each cell according to its probability of occurrence.
+
+    Args:
+        shape (tuple[int, int]): Number of rows and columns of the grid.
+
+    Returns:
+        np.ndarray: A 2D uint8 NumPy array containing the index in `MATERIALS` of the material of each cell.
+
+    Process:
+        1. A random number between 0 and 1 is drawn for every cell at once.
+        2. Each number is compared with the cumulative probabilities of the materials (0.40, 0.75, 0.90): the number
+           of thresholds it reaches is the position of the drawn material in `MATERIAL_PROBABILITIES`. The last
+           cumulative probability (1.0) is never reached and isn't compared, so the position can't go past the last
+           material.
+        3. These positions are converted into indexes in `MATERIALS`.
+    """
+    materials = list(MATERIAL_PROBABILITIES)
+    cumulative_probas = np.cumsum(list(MATERIAL_PROBABILITIES.values()))
+
+    rand_nums = np.random.random(shape) # 1
+
+    # 2
+    drawn = np.zeros(shape, dtype=np.uint8)
+    for threshold in cumulative_probas[:-1]:
+        drawn += rand_nums >= threshold
+
+    material_indexes = np.array([MATERIALS.index(material) for material in materials], dtype=np.uint8)
+    return material_indexes[drawn] # 3
+
+def build_material_grids(material_grid) -> dict[str, np.ndarray]:
+    """
+    Builds the matrices of the physical properties of the material contained in each cell.
+
+    Each matrix is obtained by indexing the table of the property in `MATERIAL_PROPERTY_TABLES` with the matrix of the
+    material indexes. The matrices are read-only: they are built once for the whole simulation and no reaction may
+    modify them.
+
+    Args:
+        material_grid (np.ndarray): A 2D NumPy array containing the index in `MATERIALS` of the material of each cell.
+
+    Returns:
+        dict[str, np.ndarray]: The matrix of each property listed in `MATERIAL_PROPERTIES`, by property name.
+    """
+    material_grids = {}
+    for name, table in MATERIAL_PROPERTY_TABLES.items():
+        material_grids[name] = table[material_grid]
+        material_grids[name].setflags(write=False)
+
+    return material_grids
+
+class Grid:
+    """
+    Holds the physical state of the whole simulation grid as a Structure of Arrays.
+
+    Each physical property of the cells is stored in its own NumPy matrix of the same dimensions as the grid. These
+    matrices are allocated once and updated in place by the thermal reactions, so that they never need to be rebuilt
+    from the cells at each frame. `Cell` objects are thin views on the elements of these matrices.
+
+    Attributes:
+        rows (int): Number of rows of the grid.
+        cols (int): Number of columns of the grid.
+        cell_width (int): Width of a cell (px).
+        cell_height (int): Height of a cell (px).
+        contact_area (float): Contact area between two cells, used in the heat conduction.
+        cell_distance (float): Distance between the centers of two adjacent cells, used in the heat conduction.
+        temp_grid (np.ndarray): Temperature of each cell (°C).
+        fuel_grid (np.ndarray): Amount of combustible material in each cell (%).
+        oxygen_grid (np.ndarray): Oxygen rate in each cell (%).
+        is_burning_grid (np.ndarray): Boolean matrix indicating whether each cell is burning.
+        burned_grid (np.ndarray): Boolean matrix indicating whether each cell is burned (fuel depleted).
+        flame_oscillation_index_grid (np.ndarray): Index in `FLAME_OSCILLATION_RATES` of the oscillation rate of each
+            cell's flame.
+        manual_ignition_expiration_grid (np.ndarray): Timestamp (ms) until which each cell is held at `MAX_TEMP`
+            following a manual ignition, 0 if the cell isn't manually ignited.
+        manual_ignition_mask (np.ndarray): Buffer of the cells whose manual ignition is running at the current step.
+        cells (list[list[Cell]]): `Cell` objects, one per element of the matrices.
+        material_grid (np.ndarray): Index in `MATERIALS` of the material of each cell.
+        state_grid (np.ndarray): State of each cell packed in a byte (material index, `STATE_BURNING` and
+            `STATE_BURNED` flags), used to draw the cells.
+        conductivity_grid (np.ndarray): Thermal conductivity of the material in each cell (W/(m·K)).
+        capacity_grid (np.ndarray): Thermal capacity of the material in each cell (kJ/(kg·K)).
+        humidity_grid (np.ndarray): Humidity of the material in each cell (%).
+        ignition_temp_grid (np.ndarray): Ignition temperature of the material in each cell (°C).
+        burn_rate_grid (np.ndarray): Burn rate of the material in each cell (kg/m²/s).
+        combustion_heat_grid (np.ndarray): Heat of combustion of the material in each cell (MJ/kg).
+        density_grid (np.ndarray): Density of the material in each cell (kg/m³).
+        interface_conductivity_grids (tuple[np.ndarray, np.ndarray]): Average thermal conductivity between each cell
+            and its right neighbor, and between each cell and its bottom neighbor (W/(m·K)).
+        inverse_capacity_grid (np.ndarray): Inverse of the thermal capacity of the material in each cell.
+        effective_ignition_temp_grid (np.ndarray): Ignition temperature of each cell, taking into account the humidity
+            of its material (°C).
+    """
+    def __init__(self, rows, cols, cell_width=CELL_WIDTH_INIT, cell_height=CELL_HEIGHT_INIT):
+        self.rows = rows
+        self.cols = cols
+        shape = (rows, cols)
+
+        # Size of the cells, which depends on the size of the screen. The heat exchanged between two cells depends on
+        # their geometry.
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+        self.contact_area, self.cell_distance = cell_geometry(cell_width, cell_height)
+
+        # Matrices of cell physical properties
+        self.temp_grid = np.full(shape, MIN_TEMP, dtype=FLOAT_DTYPE) # °C
+        self.fuel_grid = np.full(shape, 100.0, dtype=FLOAT_DTYPE)
+        self.oxygen_grid = np.full(shape, 21.0, dtype=FLOAT_DTYPE) # %
+        self.is_burning_grid = np.zeros(shape, dtype=bool)
+        self.burned_grid = np.zeros(shape, dtype=bool)
+
+        # Random factors controlling the oscillation rate of the flame of each cell.
+        self.flame_oscillation_index_grid = np.random.randint(0, len(FLAME_OSCILLATION_RATES), shape, dtype=np.uint8)
+
+        # Manual ignitions
+        self.manual_ignition_expiration_grid = np.zeros(shape, dtype=np.int64)
+        self.manual_ignition_mask = np.empty(shape, dtype=bool) # Filled at each step
+
+        # Matrices of materials physical properties
+        # Materials never change during the simulation, so these matrices are built only once.
+        self.material_grid = draw_material_grid(shape)
+        material_grids = build_material_grids(self.material_grid)
+        self.conductivity_grid = material_grids["thermal_conductivity"]
+        self.capacity_grid = material_grids["thermal_capacity"]
+        self.humidity_grid = material_grids["humidity"]
+        self.ignition_temp_grid = material_grids["ignition_temp"]
+        self.burn_rate_grid = material_grids["burn_rate"]
+        self.combustion_heat_grid = material_grids["combustion_heat"]
+        self.density_grid = material_grids["density"]
+        # The conductivities at the interfaces between the cells only depend on the materials as well.
+        self.interface_conductivity_grids = interface_conductivities(self.conductivity_grid)
+        self.inverse_capacity_grid = 1.0 / self.capacity_grid
+        self.inverse_capacity_grid.setflags(write=False)
+        self.effective_ignition_temp_grid = effective_ignition_temperatures(self.ignition_temp_grid, self.humidity_grid)
+        self.effective_ignition_temp_grid.setflags(write=False)
+
+        self.cells: list[list[Cell]] = [[Cell(self, row, col, MATERIALS[index]) for col, index in enumerate(indexes)]
+                                        for row, indexes in enumerate(self.material_grid.tolist())]
+
+        self.state_grid = np.empty(shape, dtype=np.uint8)
+        self.update_state_grid()
+
+    def __getitem__(self, row) -> list[Cell]:
+        return self.cells[row]
+
+    def ignite(self, row, col, expiration):
+        """
+        Manually ignites a cell: its temperature is held at `MAX_TEMP` until the expiration timestamp.
+
+        Args:
+            row (int): Row of the cell.
+            col (int): Column of the cell.
+            expiration (int): Timestamp (ms) at which the manual ignition ends.
+        """
+        self.manual_ignition_expiration_grid[row, col] = expiration
+
+    def step(self, delta_time, now):
+        """
+        Advances the simulation by one time step.
+
+        The cells whose manual ignition is running are first brought to `MAX_TEMP`, then the thermal reactions (heat
+        conduction, ignition and combustion) are applied one after the other to the grid matrices, which are updated
+        in place. Finally, the expired manual ignitions are reset.
+
+        Args:
+            delta_time (float): The time step for the simulation (s).
+            now (int): Current timestamp (ms), compared to the expiration timestamps of the manual ignitions.
+        """
+        # MANUAL IGNITION CONTINUITY
+        # The mask buffer is set to True for the cells whose expiration timestamp is in the future, and these cells
+        # are brought to the maximum temperature. Both operations are done in place, without allocating any array.
+        manual_ignition_mask = self.manual_ignition_mask
+        np.greater(self.manual_ignition_expiration_grid, now, out=manual_ignition_mask)
+        np.copyto(self.temp_grid, MAX_TEMP, where=manual_ignition_mask)
+
+        # The thermal reactions are only computed on the region containing the hot and burning cells: everywhere
+        # else, the cells are at the ambient temperature and don't burn, so the reactions would leave them unchanged.
+        # All three reactions work on views of the grid matrices limited to this region, so that each of them only
+        # goes through the cells that can change.
+        region = active_region(self.temp_grid, self.is_burning_grid)
+        if region is not None:
+            rows, cols = region
+            temp_grid = self.temp_grid[region]
+            is_burning_grid = self.is_burning_grid[region]
+            burned_grid = self.burned_grid[region]
+            fuel_grid = self.fuel_grid[region]
+            oxygen_grid = self.oxygen_grid[region]
+            capacity_grid = self.capacity_grid[region]
+
+            # HEAT CONDUCTION
+            # Computed tile by tile on large regions to stay in the CPU cache.
+            k_right, k_down = self.interface_conductivity_grids
+            # The interfaces of the region: one column (resp. row) less than the region for k_right (resp. k_down)
+            region_interfaces = (k_right[rows, cols.start:cols.stop - 1], k_down[rows.start:rows.stop - 1, cols])
+            heat_conduction_tiled(temp_grid, self.conductivity_grid[region], capacity_grid, delta_time,
+                                  region_interfaces, self.inverse_capacity_grid[region], self.contact_area,
+                                  self.cell_distance) # In place
+
+            # IGNITION
+            # Written directly into the burning state matrix, which is then updated in place by the combustion.
+            update_ignition(temp_grid, self.ignition_temp_grid[region], self.humidity_grid[region], burned_grid,
+                            self.effective_ignition_temp_grid[region], out=is_burning_grid)
+
+            # COMBUSTION
+            # All the state matrices are updated in place, the burned state being written directly into the grid's one.
+            update_combustion(temp_grid, fuel_grid, oxygen_grid, is_burning_grid, self.burn_rate_grid[region],
+                              self.combustion_heat_grid[region], self.density_grid[region], capacity_grid, delta_time,
+                              burned_out=burned_grid)
+
+            self.update_state_grid(region)
+
+        # MANUAL IGNITION RESET
+        # The timestamps that are out of date no longer match the mask, multiplying by it resets them to zero.
+        self.manual_ignition_expiration_grid *= manual_ignition_mask
+
+    def update_state_grid(self, region=(slice(None), slice(None))):
+        """
+        Packs the material index and the burning and burned states of each cell into `state_grid`.
+
+        Args:
+            region (tuple[slice, slice], optional): The rows and columns of the cells to update, the whole grid by
+                default.
+        """
+        state_grid = self.state_grid[region]
+        np.multiply(self.is_burning_grid[region], STATE_BURNING, out=state_grid, dtype=np.uint8)
+        state_grid |= self.material_grid[region]
+        state_grid |= self.burned_grid[region].view(np.uint8) * np.uint8(STATE_BURNED)
@@ -6,7 +6,7 @@ from src.colors import Colors
 
 colors = Colors()
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class MaterialProperties:
     """
     Physical properties common to all materials.
@@ -18,7 +18,10 @@ class MaterialProperties:
     thermal_capacity: Amount of heat required to raise the temperature of the material. [(KJ/(kg.K))]
     density: Mass per unit volume, which influences the amount of fuel available. [kg/m3]
     humidity: Quantity of water in the material, which can retard ignition and combustion. [%]
-    emissivity: Material's capacity to emit thermal energy by radiation.
+    color: Color of the cells made of the material.
+
+    The properties of a material never change, so they're frozen, and stored in slots rather than in a per-instance
+    __dict__.
     """
     ignition_temp: float # °C
     combustion_heat: float # MJ/kg
@@ -1,8 +1,9 @@
+import math
 from typing import Any
 
 import numpy as np
 
-from src.window_option import CELL_WIDTH, CELL_HEIGHT
+from src.window_option import CELL_WIDTH_INIT, CELL_HEIGHT_INIT
 
 # Heat limit values
 MAX_TEMP = 2138 # Adiabatic flame temperature at constant pressure of gasoline
@@ -17,8 +18,59 @@ MIN_OXYGEN_RATE = 5.0 # Minimum oxygen level below which combustion stops
 MEGAJOULES_TO_JOULES = 1e6 # MJ -> J
 KILOJOULES_TO_JOULES = 1e3 # KJ -> J
 
+def cell_geometry(cell_width: int, cell_height: int) -> tuple[float, float]:
+    """
+    Calculates the geometry of the cells used in the heat conduction, constant since all the cells have the same size.
+
+    Args:
+        cell_width (int): Width of a cell (px).
+        cell_height (int): Height of a cell (px).
+
+    Returns:
+        tuple[float, float]: The contact area between two cells and the distance between the centers of two adjacent
+        cells.
+    """
+    # The contact area between two cells, assuming a uniform square grid.
+    contact_area = cell_width * cell_height
+    # The distance between the centers of two adjacent cells, assuming they are touching edge to edge. Because they are
+    # squares the distance between their center will correspond to the hypothenus of a triangle where the sides are
+    # equal to the width and height of the cell.
+    # A Python float is used rather than a NumPy float64 scalar, which would upcast float32 grids to float64.
+    cell_distance = math.sqrt(cell_width ** 2 + cell_height ** 2)
+
+    return contact_area, cell_distance
+
+# Geometry of the cells of the initial size, used by default in the heat conduction. The cells of the window may be
+# smaller on small screens: the grid then passes the geometry of its own cells.
+CONTACT_AREA, CELL_DISTANCE = cell_geometry(CELL_WIDTH_INIT, CELL_HEIGHT_INIT)
+
+# Shape (rows, columns) of the tiles on which heat conduction is computed for large grids, see
+# 'heat_conduction_tiled'. A tile of float32 values is 256 KB, so the few arrays used to compute it fit in the CPU
+# cache. Wide tiles are preferred since the rows of the grid are contiguous in memory.
+CONDUCTION_TILE_SHAPE = (128, 512)
+
+def interface_conductivities(conductivity_grid: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the average thermal conductivity at the interfaces between neighboring cells.
+
+    Args:
+        conductivity_grid (np.ndarray): A 2D NumPy array representing the thermal conductivity of each cell's material.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The average conductivity between each cell and its right neighbor (one column
+        less than the grid) and between each cell and its bottom neighbor (one row less than the grid).
+    """
+    # The average is calculated by summing the conductivity of each cell with the conductivity of its neighbor and
+    # dividing by 2. The last column (resp. row) is excluded since its cells have no right (resp. bottom) neighbor.
+    k_right = (conductivity_grid[:, :-1] + conductivity_grid[:, 1:]) / 2
+    k_down = (conductivity_grid[:-1, :] + conductivity_grid[1:, :]) / 2
+
+    return k_right, k_down
+
 def heat_conduction(temp_grid: np.ndarray, conductivity_grid: np.ndarray, capacity_grid: np.ndarray,
-                    delta_time: float) -> np.ndarray[tuple[Any, Any], np.dtype[float]]:
+                    delta_time: float, interface_conductivity_grids: tuple[np.ndarray, np.ndarray] | None = None,
+                    inverse_capacity_grid: np.ndarray | None = None, contact_area: float = CONTACT_AREA,
+                    cell_distance: float = CELL_DISTANCE) -> np.ndarray[tuple[Any, Any], np.dtype[float]]:
     """
     Calculates and applies heat conduction between neighboring cells in a grid.
 
@@ -35,32 +87,51 @@ def heat_conduction(temp_grid: np.ndarray, conductivity_grid: np.ndarray, capaci
         conductivity_grid (np.ndarray): A 2D NumPy array representing the thermal conductivity of each cell's material.
         capacity_grid (np.ndarray): A 2D NumPy array representing the thermal capacity of each cell's material.
         delta_time (float): The time step for the simulation, used to scale the amount of heat transferred.
+        interface_conductivity_grids (tuple[np.ndarray, np.ndarray], optional): The average conductivities between
+            neighboring cells, as returned by `interface_conductivities(conductivity_grid)`. Since the materials
+            don't change, they can be calculated once and passed at each step. Calculated from `conductivity_grid`
+            if not given.
+        inverse_capacity_grid (np.ndarray, optional): The inverse of `capacity_grid`, which can be calculated once
+            and passed at each step as well. Calculated from `capacity_grid` if not given.
+        contact_area (float, optional): The contact area between two cells, see `cell_geometry`. `CONTACT_AREA` by
+            default.
+        cell_distance (float, optional): The distance between the centers of two neighboring cells, see
+            `cell_geometry`. `CELL_DISTANCE` by default.
 
     Returns:
         np.ndarray: A 2D NumPy array representing the updated temperature of each cell after heat conduction.
+            `temp_grid` is updated in place and returned: callers that need the temperatures before conduction must
+            pass a copy.
 
     Process:
         1. Calculate Temperature Differences:
            - Computes the temperature difference between each cell and its right neighbor (`delta_temp_right`).
            - Computes the temperature difference between each cell and its bottom neighbor (`delta_temp_down`).
+           - These differences, like all the intermediate arrays, are only computed for the interfaces between two
+             neighbors, so they have one column (resp. one row) less than the grid.
 
         2. Calculate Average Conductivity:
            - Determines the average thermal conductivity at the interface between neighboring cells
-             for both horizontal (`k_right`) and vertical (`k_down`) neighbors.
+             for both horizontal (`k_right`) and vertical (`k_down`) neighbors, unless they're given.
 
         3. Calculate Heat Transfer:
            - Computes the amount of heat transferred between neighbors based on the temperature
              difference, average conductivity, contact area, distance between cell centers, and
              the simulation time step. The formula used is a simplified form of Fourier's Law.
             - `contact_area`: is the contact surface between two cells.
-            - `distance`: The distance between the centers of two neighboring cells.
+            - `cell_distance`: The distance between the centers of two neighboring cells.
+            - These constants and the time step are combined into a single factor applied to the product of the
+              conductivity and the temperature difference.
            - `heat_transfer_right`: Heat transferred from a cell to it's right neighbor.
            - `heat_transfer_down`: Heat transferred from a cell to it's neighbor below.
 
         4. Update Temperatures:
            - Updates the temperature of each cell by decreasing the temperature of the heat-donating
              cell and increasing the temperature of the heat-receiving cell.
-           - The temperature change is scaled by the inverse of the cell's thermal capacity.
+           - The temperature change is scaled by the inverse of the cell's thermal capacity, which is multiplied
+             rather than dividing by the capacity.
+           - All the heat transfers are calculated from the temperatures before conduction, so the horizontal and
+             vertical updates don't depend on their order.
            - Cells are indexed in such a way that the energy is correctly transferred from one to the other.
 
         5. Temperature Clamping:
@@ -69,54 +140,48 @@ def heat_conduction(temp_grid: np.ndarray, conductivity_grid: np.ndarray, capaci
     Assumptions:
         - Heat transfer only occurs between direct horizontal and vertical neighbors.
         - The contact area between cells is considered constant.
-        - The distance between cell centers is constant and calculated based on `CELL_WIDTH` and `CELL_HEIGHT`.
+        - The distance between cell centers is constant and calculated based on the width and height of the cells.
         - The mass of the cell is included in the thermal capacity.
         - Heat diffusion is considered isotropic.
-        - The simulation grid has constant `CELL_WIDTH` and `CELL_HEIGHT`.
+        - All the cells of the simulation grid have the same width and height.
     """
     # --- 1. Calculate Temperature Differences ---
     # Calculate the temperature difference between each cell and its right neighbor.
-    # We create an array of the same size and type as 'temp_grid', initialized with zeros.
-    # Then, we calculate the temperature differences between each cell and its right neighbor,
-    # excluding the last column because cells in the last column have no right neighbor.
+    # The differences are only calculated for the interfaces between two horizontal neighbors, excluding the last
+    # column because cells in the last column have no right neighbor. The resulting array therefore has one column
+    # less than 'temp_grid', which avoids allocating and filling a full-size array whose last column is never used.
     # The temperature difference is calculated as (temperature of the cell) - (temperature of the right neighbor).
-    delta_temp_right = np.zeros_like(temp_grid)
-    delta_temp_right[:, :-1] = temp_grid[:, :-1] - temp_grid[:, 1:]
+    delta_temp_right = temp_grid[:, :-1] - temp_grid[:, 1:]
 
     # Calculate the temperature difference between each cell and its bottom neighbor.
     # This is done similarly to the horizontal difference, but this time we exclude the last row,
-    # because cells in the last row have no bottom neighbor.
+    # because cells in the last row have no bottom neighbor. The resulting array has one row less than 'temp_grid'.
     # The temperature difference is calculated as (temperature of the cell) - (temperature of the bottom neighbor).
-    delta_temp_down = np.zeros_like(temp_grid)
-    delta_temp_down[:-1, :] = temp_grid[:-1, :] - temp_grid[1:, :]
+    delta_temp_down = temp_grid[:-1, :] - temp_grid[1:, :]
 
     # --- 2. Calculate Average Conductivity ---
-    # Calculate the average thermal conductivity between each cell and its right neighbor.
-    # We initialize an array of zeros and calculate the average by summing the conductivity of each cell
-    # with the conductivity of its right neighbor and dividing by 2.
-    # We exclude the last column, similar to the temperature difference calculation.
-    k_right = np.zeros_like(temp_grid)
-    k_right[:, :-1] = (conductivity_grid[:, :-1] + conductivity_grid[:, 1:]) / 2
-
-    # Calculate the average thermal conductivity between each cell and its bottom neighbor.
-    # This is done similarly to the horizontal average conductivity, but we exclude the last row.
-    k_down = np.zeros_like(temp_grid)
-    k_down[:-1, :] = (conductivity_grid[:-1, :] + conductivity_grid[1:, :]) / 2
+    # Average thermal conductivity between each cell and its right neighbor (k_right) and its bottom neighbor
+    # (k_down). They only depend on the materials, so they may have been calculated beforehand.
+    if interface_conductivity_grids is None:
+        interface_conductivity_grids = interface_conductivities(conductivity_grid)
+    k_right, k_down = interface_conductivity_grids
 
     # --- 3. Calculate Heat Transfer ---
-    # Define the contact area between two cells, assuming a uniform square grid.
-    contact_area = CELL_WIDTH * CELL_HEIGHT
-    # Calculate the distance between the centers of two adjacent cells, assuming they are touching edge to edge.
-    # Because they are squares the distance between their center will correspond to the hypothenus of a triangle
-    # where the sides are equal to the width and height of the cell.
-    distance = np.sqrt(CELL_WIDTH ** 2 + CELL_HEIGHT ** 2)
+    # The heat transfer is proportional to the average conductivity, the temperature difference, the contact area,
+    # the inverse of the distance, and the time step. The last three are the same for all the cells, so they're
+    # combined into a single factor (a Python float, which doesn't upcast float32 grids) applied in place.
+    heat_factor = contact_area / cell_distance * delta_time
 
     # Calculate the heat transfer between each cell and its right neighbor based on a simplified Fourier's Law.
-    # The heat transfer is proportional to the average conductivity, the temperature difference, the contact area,
-    # the inverse of the distance, and the time step.
-    heat_transfer_right = k_right * delta_temp_right * contact_area / distance * delta_time
+    # The temperature differences are no longer needed once multiplied, so the heat transfers are computed in place
+    # in their arrays rather than in new ones.
+    heat_transfer_right = delta_temp_right
+    heat_transfer_right *= k_right
+    heat_transfer_right *= heat_factor
     # Calculate the heat transfer between each cell and its bottom neighbor, similar to the horizontal transfer.
-    heat_transfer_down = k_down * delta_temp_down * contact_area / distance * delta_time
+    heat_transfer_down = delta_temp_down
+    heat_transfer_down *= k_down
+    heat_transfer_down *= heat_factor
 
     # --- 4. Update Temperatures ---
     # Update the temperature of the cells by applying the calculated heat transfer.
@@ -125,13 +190,22 @@ def heat_conduction(temp_grid: np.ndarray, conductivity_grid: np.ndarray, capaci
     # The array indexing is critical here: we are decreasing the temperature of cells in the left part of the grid
     # and increasing the temperature of the cells in the right part of the grid, but using the same heat_transfer
     # array to avoid double-counting.
-    temp_grid[:, :-1] -= heat_transfer_right[:, :-1] / capacity_grid[:, :-1] # Cell on the left lose heat
-    temp_grid[:, 1:] += heat_transfer_right[:, :-1] / capacity_grid[:, 1:] # Cell on the right gain heat
+    # Multiplying by the inverse of the capacity is cheaper than dividing by it, and the inverse only depends on the
+    # materials, so it may have been calculated beforehand.
+    if inverse_capacity_grid is None:
+        inverse_capacity_grid = 1.0 / capacity_grid
+    # The temperature changes of both cells of each pair are computed one after the other in the same buffer.
+    temp_change_right = np.multiply(heat_transfer_right, inverse_capacity_grid[:, :-1])
+    temp_grid[:, :-1] -= temp_change_right # Cell on the left lose heat
+    np.multiply(heat_transfer_right, inverse_capacity_grid[:, 1:], out=temp_change_right)
+    temp_grid[:, 1:] += temp_change_right # Cell on the right gain heat
 
     # Do the same for vertical neighbors. The cell above loses heat, and the cell below gains it.
     # The temperature change is scaled by the inverse of the cell's thermal capacity.
-    temp_grid[:-1, :] -= heat_transfer_down[:-1, :] / capacity_grid[:-1, :] # Cell above lose heat
-    temp_grid[1:, :] += heat_transfer_down[:-1, :] / capacity_grid[1:, :] # Cell below gain heat
+    temp_change_down = np.multiply(heat_transfer_down, inverse_capacity_grid[:-1, :])
+    temp_grid[:-1, :] -= temp_change_down # Cell above lose heat
+    np.multiply(heat_transfer_down, inverse_capacity_grid[1:, :], out=temp_change_down)
+    temp_grid[1:, :] += temp_change_down # Cell below gain heat
 
     # --- 5. Temperature Clamping ---
     # Ensure that no cell's temperature drops below MIN_TEMP (ambient temperature) and no cell's temperature exceeds
@@ -141,8 +215,153 @@ def heat_conduction(temp_grid: np.ndarray, conductivity_grid: np.ndarray, capaci
 
     return temp_grid
 
-def update_ignition(temperature_grid, ignition_temp_grid, humidity_grid,
-                    burned_grid) -> np.ndarray[tuple[Any, Any], np.dtype[bool]]:
+def active_region(temp_grid: np.ndarray, is_burning_grid: np.ndarray = None) -> tuple[slice, slice] | None:
+    """
+    Finds the region of the grid where the thermal reactions can change the cells.
+
+    Heat is only exchanged between cells at different temperatures. Outside the smallest rectangle containing all the
+    cells above the ambient temperature (`MIN_TEMP`), all the cells are at the ambient temperature and exchange no
+    heat, so heat conduction only needs to be computed on this rectangle, extended by one cell on each side for the
+    cells that receive heat from its edges.
+
+    If the burning cells are given, they're included in the region as well. The cells outside the region are then
+    neither burning nor hot enough to ignite, so ignition and combustion leave them unchanged too.
+
+    Args:
+        temp_grid (np.ndarray): A 2D NumPy array representing the temperature of each cell in the grid.
+        is_burning_grid (np.ndarray, optional): A 2D boolean NumPy array indicating whether each cell is burning.
+
+    Returns:
+        tuple[slice, slice] | None: The rows and columns of the region, or None if all the cells are at the ambient
+        temperature (and none of them is burning).
+    """
+    active_grid = temp_grid > MIN_TEMP
+    if is_burning_grid is not None:
+        active_grid |= is_burning_grid
+    active_rows = np.flatnonzero(active_grid.any(axis=1))
+    if active_rows.size == 0:
+        return None
+    active_cols = np.flatnonzero(active_grid.any(axis=0))
+
+    rows, cols = temp_grid.shape
+    return (slice(max(active_rows[0] - 1, 0), min(active_rows[-1] + 2, rows)),
+            slice(max(active_cols[0] - 1, 0), min(active_cols[-1] + 2, cols)))
+
+def heat_conduction_tiled(temp_grid: np.ndarray, conductivity_grid: np.ndarray, capacity_grid: np.ndarray,
+                          delta_time: float, interface_conductivity_grids: tuple[np.ndarray, np.ndarray] | None = None,
+                          inverse_capacity_grid: np.ndarray | None = None, contact_area: float = CONTACT_AREA,
+                          cell_distance: float = CELL_DISTANCE,
+                          tile_shape: tuple[int, int] = CONDUCTION_TILE_SHAPE) -> np.ndarray:
+    """
+    Applies heat conduction to the grid tile by tile, with the same result as `heat_conduction`.
+
+    On large grids, each whole-grid operation of `heat_conduction` reads and writes arrays far larger than the CPU
+    cache, so the computation is limited by memory bandwidth. Computing the conduction on one tile at a time keeps the
+    intermediate arrays of each tile in the cache.
+
+    Args:
+        temp_grid (np.ndarray): A 2D NumPy array representing the temperature of each cell in the grid.
+        conductivity_grid (np.ndarray): A 2D NumPy array representing the thermal conductivity of each cell's material.
+        capacity_grid (np.ndarray): A 2D NumPy array representing the thermal capacity of each cell's material.
+        delta_time (float): The time step for the simulation, used to scale the amount of heat transferred.
+        interface_conductivity_grids (tuple[np.ndarray, np.ndarray], optional): The average conductivities between
+            neighboring cells, see `heat_conduction`.
+        inverse_capacity_grid (np.ndarray, optional): The inverse of `capacity_grid`, see `heat_conduction`.
+        contact_area (float, optional): The contact area between two cells, see `heat_conduction`.
+        cell_distance (float, optional): The distance between the centers of two neighboring cells, see
+            `heat_conduction`.
+        tile_shape (tuple[int, int]): Maximum number of rows and columns of a tile.
+
+    Returns:
+        np.ndarray: A 2D NumPy array representing the updated temperature of each cell after heat conduction.
+            `temp_grid` is updated in place and returned: callers that need the temperatures before conduction must
+            pass a copy.
+
+    Process:
+        1. A grid that fits in a single tile is passed directly to `heat_conduction`.
+        2. Otherwise, the temperatures before conduction are copied, since the tiles must all be computed from them.
+        3. Each tile is extended by a halo of one cell on each side, so that the heat exchanged with the neighbors
+           of its border cells is taken into account. `heat_conduction` is applied to a copy of this extended tile.
+        4. Only the cells of the tile itself are written back into `temp_grid`: the halo cells miss some of their
+           neighbors and are computed by the tiles they belong to.
+    """
+    rows, cols = temp_grid.shape
+    tile_rows, tile_cols = tile_shape
+
+    # --- 1. Small Grid ---
+    if rows <= tile_rows and cols <= tile_cols:
+        return heat_conduction(temp_grid, conductivity_grid, capacity_grid, delta_time, interface_conductivity_grids,
+                               inverse_capacity_grid, contact_area, cell_distance)
+
+    # --- 2. Temperatures Before Conduction ---
+    source_grid = temp_grid.copy()
+    if interface_conductivity_grids is None:
+        interface_conductivity_grids = interface_conductivities(conductivity_grid)
+    k_right, k_down = interface_conductivity_grids
+    if inverse_capacity_grid is None:
+        inverse_capacity_grid = 1.0 / capacity_grid
+
+    for row_start in range(0, rows, tile_rows):
+        row_end = min(row_start + tile_rows, rows)
+        # Rows of the tile and its halo, limited to the edges of the grid
+        halo_row_start = max(row_start - 1, 0)
+        halo_row_end = min(row_end + 1, rows)
+
+        for col_start in range(0, cols, tile_cols):
+            col_end = min(col_start + tile_cols, cols)
+            halo_col_start = max(col_start - 1, 0)
+            halo_col_end = min(col_end + 1, cols)
+
+            # --- 3. Conduction on the Extended Tile ---
+            halo = (slice(halo_row_start, halo_row_end), slice(halo_col_start, halo_col_end))
+            # The interfaces of the extended tile: one column (resp. row) less than the tile for k_right (resp. k_down)
+            tile_interfaces = (k_right[halo_row_start:halo_row_end, halo_col_start:halo_col_end - 1],
+                               k_down[halo_row_start:halo_row_end - 1, halo_col_start:halo_col_end])
+            tile = heat_conduction(source_grid[halo].copy(), conductivity_grid[halo], capacity_grid[halo],
+                                   delta_time, tile_interfaces, inverse_capacity_grid[halo], contact_area,
+                                   cell_distance)
+
+            # --- 4. Write Back the Tile ---
+            temp_grid[row_start:row_end, col_start:col_end] = tile[row_start - halo_row_start:row_end - halo_row_start,
+                                                                   col_start - halo_col_start:col_end - halo_col_start]
+
+    return temp_grid
+
+def effective_ignition_temperatures(ignition_temp_grid: np.ndarray, humidity_grid: np.ndarray) -> np.ndarray:
+    """
+    Calculates the effective ignition temperature of each cell, taking into account the material's humidity.
+
+    The humidity increases the effective ignition temperature, making it harder for the cell to ignite. It only
+    depends on the materials, so it can be calculated once and passed to `update_ignition` at each step.
+
+    Args:
+        ignition_temp_grid (np.ndarray): A 2D NumPy array representing the ignition temperature of the material in
+            each cell.
+        humidity_grid (np.ndarray): A 2D NumPy array representing the humidity level of the material in each cell.
+
+    Returns:
+        np.ndarray: A 2D NumPy array representing the effective ignition temperature of each cell, at least 100.0.
+
+    Process:
+        - A scaling factor (`material_humidity_effect_scale`) controls how much the humidity affects the effective
+          ignition temperature.
+        - The formula is:
+          `effective_ignition_temp = ignition_temp * (1 + humidity / material_humidity_effect_scale)`.
+        - Then, a minimum effective ignition temperature of 100.0 is enforced, preventing unrealistically low values.
+    """
+    # Define the factor controlling the impact of humidity on the effective ignition temperature.
+    # A smaller scale value results in a higher effective ignition temperature.
+    material_humidity_effect_scale = 200
+    # Calculate the effective ignition temperature for each cell, considering the humidity of the material.
+    # Higher humidity increases the effective ignition temperature, making ignition harder.
+    effective_ignition_temp = ignition_temp_grid * (1 + humidity_grid / material_humidity_effect_scale)
+    # Ensure that the effective ignition temperature is at least 100.0 to avoid unrealistic values.
+    effective_ignition_temp = np.maximum(effective_ignition_temp, 100.0)
+
+    return effective_ignition_temp
+
+def update_ignition(temperature_grid, ignition_temp_grid, humidity_grid, burned_grid,
+                    effective_ignition_temp_grid=None, out=None) -> np.ndarray[tuple[Any, Any], np.dtype[bool]]:
     """
     Determines which cells should ignite based on their effective ignition temperature.
 
@@ -160,10 +379,19 @@ def update_ignition(temperature_grid, ignition_temp_grid, humidity_grid,
             level of the material in each cell.
         burned_grid (np.ndarray): A 2D NumPy array of boolean values indicating
             whether each cell has already burned out.
+        effective_ignition_temp_grid (np.ndarray, optional): The effective
+            ignition temperature of each cell, as returned by
+            `effective_ignition_temperatures(ignition_temp_grid, humidity_grid)`.
+            Since the materials don't change, it can be calculated once and
+            passed at each step. Calculated if not given.
+        out (np.ndarray, optional): A 2D NumPy array of boolean values in
+            which the result is written, typically the burning state matrix of
+            the grid, so that it is updated in place rather than copied from a
+            new array. A new array is allocated if not given.
 
     Returns:
         np.ndarray: A 2D NumPy array of boolean values indicating whether each
-            cell is currently on fire (`True`) or not (`False`).
+            cell is currently on fire (`True`) or not (`False`), `out` if given.
 
     Process:
         1. Calculate Effective Ignition Temperature:
@@ -178,6 +406,8 @@ def update_ignition(temperature_grid, ignition_temp_grid, humidity_grid,
            - The formula is:
              `effective_ignition_temp = ignition_temp * (1 + humidity / material_humidity_effect_scale)`.
            - Then, a minimum effective ignition temperature of 100.0 is enforced.
+           - See `effective_ignition_temperatures`, skipped if the effective
+             ignition temperatures are given.
 
         2. Determine Ignited Cells:
            - Compares the current temperature of each cell to its effective
@@ -202,24 +432,22 @@ def update_ignition(temperature_grid, ignition_temp_grid, humidity_grid,
         - All parameters (temperature, ignition temperature, humidity, burned status) are available for each cell.
     """
     # --- 1. Calculate Effective Ignition Temperature ---
-    # Define the factor controlling the impact of humidity on the effective ignition temperature.
-    # A smaller scale value results in a higher effective ignition temperature.
-    material_humidity_effect_scale = 200
-    # Calculate the effective ignition temperature for each cell, considering the humidity of the material.
-    # Higher humidity increases the effective ignition temperature, making ignition harder.
-    effective_ignition_temp = ignition_temp_grid * (1 + humidity_grid / material_humidity_effect_scale)
-    # Ensure that the effective ignition temperature is at least 100.0 to avoid unrealistic values.
-    effective_ignition_temp = np.maximum(effective_ignition_temp, 100.0)
+    # The effective ignition temperatures only depend on the materials, so they may have been calculated beforehand.
+    effective_ignition_temp = effective_ignition_temp_grid
+    if effective_ignition_temp is None:
+        effective_ignition_temp = effective_ignition_temperatures(ignition_temp_grid, humidity_grid)
 
     # --- 2. Determine Ignited Cells ---
     # Determine which cells are currently burning.
     # A cell ignites if its temperature is at or above its effective ignition temperature AND it has not already burned.
-    is_burning_grid = (temperature_grid >= effective_ignition_temp) & (~burned_grid)
-    
+    # The comparison is written directly in 'out', and the burned cells are then removed from it in place.
+    is_burning_grid = np.greater_equal(temperature_grid, effective_ignition_temp, out=out)
+    is_burning_grid &= ~burned_grid
+
     return is_burning_grid
 
 def update_combustion(temperature_grid, fuel_grid, oxygen_grid, is_burning_grid, burn_rate_grid, combustion_heat_grid,
-                      density_grid, thermal_capacity_grid, delta_time) -> tuple:
+                      density_grid, thermal_capacity_grid, delta_time, burned_out=None) -> tuple:
     """
     Updates the combustion state of cells in the grid based on fuel, oxygen, and burning status.
 
@@ -240,9 +468,13 @@ def update_combustion(temperature_grid, fuel_grid, oxygen_grid, is_burning_grid,
         thermal_capacity_grid (np.ndarray): A 2D NumPy array representing the thermal capacity of the material in
         each cell.
         delta_time (float): The time step for the simulation.
+        burned_out (np.ndarray, optional): A 2D NumPy array of boolean values in which the burned status is written,
+            typically the burned state matrix of the grid. A new array is allocated if not given.
 
     Returns:
         tuple: A tuple containing the updated temperature_grid, fuel_grid, oxygen_grid, is_burning_grid, and burned_grid.
+            The temperature, fuel, oxygen and burning grids are updated in place, the returned ones are the arrays
+            that were passed, as well as `burned_out` if given.
 
     Process:
         1. Calculate Fuel Consumption:
@@ -276,7 +508,10 @@ def update_combustion(temperature_grid, fuel_grid, oxygen_grid, is_burning_grid,
                 - It has consumed all it's fuel `fuel_grid <= 0`.
                 - It is not burning anymore AND have consumed all it's fuel `~is_burning_grid & (fuel_grid <= 1e-6)`.
                 - It is not burning anymore AND have consumed all it's oxygen `~is_burning_grid & (oxygen_grid <= 5.0)`
-            - Once a cell is `burned` there is no more fuel : `fuel_grid = np.where(burned_grid, 0.0, fuel_grid)`
+            - A cell without fuel has just stopped burning (step 6), so the first condition is included in the second
+              and the status is computed in a single expression:
+              `~is_burning_grid & ((fuel_grid <= 1e-7) | (oxygen_grid <= 5.0))`.
+            - Once a cell is `burned` there is no more fuel : its fuel is set to 0.0 where `burned_grid` is True.
 
     Assumptions:
         - Each cell has a volume of 1.0 m³.
@@ -290,13 +525,16 @@ def update_combustion(temperature_grid, fuel_grid, oxygen_grid, is_burning_grid,
     # Calculate the amount of fuel consumed in each burning cell.
     # 'is_burning_grid' is a boolean array; when used in arithmetic operations, True is treated as 1 and False as 0.
     # Therefore, only burning cells (True) will consume fuel.
-    fuel_consumed = burn_rate_grid * delta_time * is_burning_grid
+    # The intermediate results of the function are computed in place in as few arrays as possible, so that each step
+    # doesn't allocate a new grid-sized array for every operation.
+    fuel_consumed = burn_rate_grid * delta_time
+    fuel_consumed *= is_burning_grid
 
     # --- 2. Update Fuel ---
     # Decrease the fuel level in each cell by the consumed amount.
     fuel_grid -= fuel_consumed
     # Ensure fuel level does not go below zero.
-    fuel_grid = np.maximum(fuel_grid, 0.0) # Prevent negative
+    np.maximum(fuel_grid, 0.0, out=fuel_grid) # Prevent negative
 
     # --- 3. Calculate Heat Generation ---
     # Calculate the heat generated by the combustion of the consumed fuel.
@@ -304,24 +542,33 @@ def update_combustion(temperature_grid, fuel_grid, oxygen_grid, is_burning_grid,
     cell_mass = cell_volume * density_grid
 
     # Heat generated per cell (assuming 1m³ and some implicit units for combustion_heat).
-    #
-    heat_generated = fuel_consumed * combustion_heat_grid * MEGAJOULES_TO_JOULES
+    heat_generated = fuel_consumed * combustion_heat_grid
+    heat_generated *= MEGAJOULES_TO_JOULES
 
     # --- 4. Update Temperature ---
     # Calculate the temperature change due to the heat generated.
     # We use the formula : delta_T = heat_generated / (mass * specific_heat_capacity)
-    delta_temp = heat_generated / (cell_mass * thermal_capacity_grid * KILOJOULES_TO_JOULES)
+    # The heat capacity of the cells is computed in the array of their mass, and the temperature change in the array
+    # of the heat generated.
+    heat_capacity = cell_mass
+    heat_capacity *= thermal_capacity_grid
+    heat_capacity *= KILOJOULES_TO_JOULES
+    delta_temp = heat_generated
+    delta_temp /= heat_capacity
     # Update temperature by adding the temperature change.
     temperature_grid += delta_temp
     # Ensure that the maximum value is not exceeded.
-    temperature_grid = np.minimum(temperature_grid, MAX_TEMP)
+    np.minimum(temperature_grid, MAX_TEMP, out=temperature_grid)
 
     # --- 5. Update Oxygen ---
     # Decrease the oxygen level in each cell based on fuel consumed.
-    oxygen_consumed = fuel_consumed * OXYGEN_CONSUMPTION_FACTOR
-    oxygen_grid -= oxygen_consumed * delta_time
+    # The fuel consumed is no longer needed, its array is reused for the oxygen consumed.
+    oxygen_consumed = fuel_consumed
+    oxygen_consumed *= OXYGEN_CONSUMPTION_FACTOR
+    oxygen_consumed *= delta_time
+    oxygen_grid -= oxygen_consumed
     # Ensure oxygen level does not go below zero.
-    oxygen_grid = np.maximum(oxygen_grid, 0.0)
+    np.maximum(oxygen_grid, 0.0, out=oxygen_grid)
 
     # --- 6. Update Burning Status ---
     # Update the burning state based on fuel and oxygen availability.
@@ -332,11 +579,14 @@ def update_combustion(temperature_grid, fuel_grid, oxygen_grid, is_burning_grid,
     # -There is no more fuel.
     # -If there is no more fuel AND the cell is not burning.
     # -If there is not enough oxygen AND the cell is not burning.
-    burned_grid = fuel_grid <= 0
-    burned_grid = burned_grid | (~is_burning_grid & (fuel_grid <= 1e-7))
-    burned_grid = burned_grid | (~is_burning_grid & (oxygen_grid <= MIN_OXYGEN_RATE))
+    # A cell with no more fuel can't be burning anymore (see step 6), so the first condition is included in the
+    # second one, and the cell not burning is common to the two others. The three conditions are therefore combined
+    # in a single boolean array, updated in place.
+    burned_grid = np.less_equal(fuel_grid, 1e-7, out=burned_out)
+    burned_grid |= oxygen_grid <= MIN_OXYGEN_RATE
+    burned_grid &= ~is_burning_grid
 
     # If burned status is True, there is no more fuel.
-    fuel_grid = np.where(burned_grid, 0.0, fuel_grid)
+    np.copyto(fuel_grid, 0.0, where=burned_grid)
 
     return temperature_grid, fuel_grid, oxygen_grid, is_burning_grid, burned_grid
\ No newline at end of file
@@ -0,0 +1,173 @@
+import pygame
+import numpy as np
+
+from src.window_option import MARGIN
+from src.physics import MAX_TEMP
+from src.constants import FLAME_OSCILLATION_RATES
+from src.grid import MATERIALS, STATE_BURNING, STATE_BURNED, STATE_COUNT
+from src.colors import Colors
+
+colors = Colors()
+
+SHOW_GRADIENT_ANIMATION = True
+
+class GridRenderer:
+    """
+    Draws the whole grid on a surface in a single operation.
+
+    Rather than drawing each cell with its own `pygame.draw.rect` call, the color of every cell is computed at once
+    with NumPy from the grid matrices, written into a pixel buffer the size of the surface, and the buffer is copied
+    to the surface with a single `pygame.surfarray.blit_array` call.
+
+    Attributes:
+        grid (Grid): The grid to draw.
+        surface (pygame.Surface): The surface on which the grid is drawn.
+        pixels (np.ndarray): RGB pixel buffer of the surface, indexed by (x, y).
+        cell_pixels (np.ndarray): View on the pixels of the cells in `pixels`, indexed by (column, x offset, row,
+            y offset). The margins between the cells aren't part of this view and keep the background color.
+        palette (np.ndarray): Color of each possible cell state, indexed by the states of the grid's `state_grid`.
+        drawn_state_grid (np.ndarray): Copy of the grid's `state_grid` as it was when the grid was last drawn.
+        drawn_color_grid (np.ndarray): Colors of the cells as they were when the grid was last drawn, None until the
+            grid is drawn for the first time.
+    """
+    def __init__(self, grid, surface):
+        self.grid = grid
+        self.surface = surface
+
+        self.pixels = np.empty((*surface.get_size(), 3), dtype=np.uint8)
+        self.pixels[:] = colors.background
+
+        # Each cell occupies a block of (MARGIN + cell width) x (MARGIN + cell height) pixels, starting with the margin.
+        # The region of the buffer covered by the cells is therefore split into blocks, from which the margins are
+        # excluded.
+        block_width = MARGIN + grid.cell_width
+        block_height = MARGIN + grid.cell_height
+        blocks = self.pixels[:grid.cols * block_width, :grid.rows * block_height].reshape(grid.cols, block_width,
+                                                                                           grid.rows, block_height, 3)
+        self.cell_pixels = blocks[:, MARGIN:, :, MARGIN:]
+
+        # The colors of all the possible cell states are computed only once, so that the color of all the cells can
+        # then be obtained by indexing this palette with the states of the cells, without any per-cell branching.
+        self.palette = np.zeros((STATE_COUNT, 3), dtype=np.uint8)
+        for index, material in enumerate(MATERIALS):
+            self.palette[index] = material.value.color # Intact cell
+            self.palette[index | STATE_BURNED] = colors.black # Burned cell
+            # Burning cell, drawn with the flame gradient if SHOW_GRADIENT_ANIMATION is enabled.
+            self.palette[index | STATE_BURNING] = colors.red
+            self.palette[index | STATE_BURNING | STATE_BURNED] = colors.red
+
+        # No cell can be in the state STATE_COUNT - 1 (all bits set), so the grid is always drawn the first time.
+        self.drawn_state_grid = np.full_like(grid.state_grid, STATE_COUNT - 1)
+        self.drawn_color_grid = None
+
+    def compute_colors(self, ticks) -> np.ndarray:
+        """
+        Computes the color of each cell of the grid.
+
+        Args:
+            ticks (int): Number of milliseconds elapsed since pygame was initialized, used to animate the flames.
+
+        Returns:
+            np.ndarray: A (rows, columns, 3) uint8 NumPy array containing the RGB color of each cell.
+        """
+        grid = self.grid
+        color_grid = self.palette[grid.state_grid]
+
+        if not SHOW_GRADIENT_ANIMATION:
+            return color_grid
+
+        # --- Flame Color Gradient Based on Temperature and Oscillation ---
+        burning = grid.is_burning_grid
+        ignition_temp = grid.ignition_temp_grid[burning]
+
+        # 1. Normalize Temperature:
+        #    - We want to map the temperature to a range between 0 and 1.
+        #    - `temperature - ignition_temp`: We subtract the ignition temperature because we're only interested in the
+        #      temperature above which the cell is burning.
+        #    - `MAX_TEMP - ignition_temp`: This is the maximum possible range of temperatures above the ignition point.
+        #    - `flame_intensity` will be 0 when the temperature equals the ignition temperature and it will be 1 when
+        #      the temperature equals `MAX_TEMP`.
+        # 2. Clamp the Intensity:
+        #    - We clamp the intensity between 0 and 1 using `np.clip()`, even if the temperature goes outside the
+        #      [ignition_temp, MAX_TEMP] range.
+        flame_intensity = (grid.temp_grid[burning] - ignition_temp) / (MAX_TEMP - ignition_temp)
+        np.clip(flame_intensity, 0, 1, out=flame_intensity)
+
+        # 3. Create an Oscillation Factor:
+        #    - This part creates a value that oscillates smoothly between 0 and 1 over time.
+        #    - `/ 200.0`: Divides the ticks by 200 to slow down the oscillation.
+        #    - `* FLAME_OSCILLATION_RATES`: Multiplies by the rates between 0.1 and 0.3 that make each cell's flame
+        #      oscillate at a slightly different rate.
+        #    - `np.sin(...) * 0.5 + 0.5`: The sine wave between -1 and 1 is scaled to the [0, 1] range.
+        #    - The factor is only computed once per rate, and each burning cell takes the one of its own rate.
+        oscillation_factors = np.sin(ticks / 200.0 * FLAME_OSCILLATION_RATES) * 0.5 + 0.5
+        oscillation_factor = oscillation_factors[grid.flame_oscillation_index_grid[burning]]
+
+        # 4. Combine Intensity and Oscillation:
+        #    - The color will vary between the color of the flame at the given intensity and yellow.
+        gradient_value = flame_intensity * oscillation_factor
+
+        # 5. Create the Color Gradient:
+        #    - The red component stays at 255 and the blue component at 0.
+        #    - The green component goes from 255 (gradient_value = 0) to 165 (gradient_value = 0.5, orange) and to
+        #      0 (gradient_value = 1).
+        flame_colors = np.zeros((gradient_value.size, 3), dtype=np.uint8)
+        flame_colors[:, 0] = 255
+        flame_colors[:, 1] = np.interp(gradient_value, [0, 0.5, 1], [255, 165, 0])
+        color_grid[burning] = flame_colors
+
+        return color_grid
+
+    def draw(self, ticks, force=False) -> pygame.Rect | None:
+        """
+        Draws the cells whose color has changed since the grid was last drawn.
+
+        The colors of the cells only depend on their state, except for the burning cells whose flames are animated. So
+        as long as no cell is burning and no state has changed, the surface already shows the grid and isn't redrawn.
+        Otherwise, only the smallest rectangle of cells containing all the cells whose color has changed is copied to
+        the surface.
+
+        Args:
+            ticks (int): Number of milliseconds elapsed since pygame was initialized, used to animate the flames.
+            force (bool): Draws the whole surface even if the grid's appearance hasn't changed, e.g. when something
+                else has been drawn over it.
+
+        Returns:
+            pygame.Rect | None: The area of the surface that has been drawn, to be updated on the display, or None if
+            the surface was already up to date.
+        """
+        grid = self.grid
+        force = force or self.drawn_color_grid is None # The first drawing covers the whole surface
+        if (not force and not grid.is_burning_grid.any()
+                and np.array_equal(grid.state_grid, self.drawn_state_grid)):
+            return None
+        self.drawn_state_grid[:] = grid.state_grid
+
+        color_grid = self.compute_colors(ticks)
+
+        if force:
+            rows = slice(0, grid.rows)
+            cols = slice(0, grid.cols)
+            rect = self.surface.get_rect()
+        else:
+            # Rows and columns of the cells whose color has changed
+            changed_grid = (color_grid != self.drawn_color_grid).any(axis=2)
+            changed_rows = np.flatnonzero(changed_grid.any(axis=1))
+            if changed_rows.size == 0:
+                return None
+            changed_cols = np.flatnonzero(changed_grid.any(axis=0))
+            rows = slice(changed_rows[0], changed_rows[-1] + 1)
+            cols = slice(changed_cols[0], changed_cols[-1] + 1)
+
+            block_width = MARGIN + grid.cell_width
+            block_height = MARGIN + grid.cell_height
+            rect = pygame.Rect(cols.start * block_width, rows.start * block_height,
+                               (cols.stop - cols.start) * block_width, (rows.stop - rows.start) * block_height)
+        self.drawn_color_grid = color_grid
+
+        # The color of each cell is broadcast to all the pixels of its block.
+        self.cell_pixels[cols, :, rows] = color_grid[rows, cols].transpose(1, 0, 2)[:, None, :, None, :]
+        pygame.surfarray.blit_array(self.surface.subsurface(rect),
+                                    self.pixels[rect.left:rect.right, rect.top:rect.bottom])
+
+        return rect
@@ -1,26 +1,10 @@
 import pygame
 
-pygame.init()
-
-clock = pygame.time.Clock()
 fps = 30
 
-# Favicon
-favicon = pygame.image.load("assets/favicon.png")
-pygame.display.set_icon(favicon)
-
 # The size of the window is a fraction of the size of the user's screen. It's on the basis of this window's dimensions
 # that cell size (if required) and the number of cells per row and column are adjusted.
-
-# Recovering screen dimensions.
-user_screen_info = pygame.display.Info()
-USER_SCREEN_WIDTH = user_screen_info.current_w
-USER_SCREEN_HEIGHT = user_screen_info.current_h
-scale = 0.66
-
-# Sizing the window to the desired scale
-WIN_WIDTH = int(USER_SCREEN_WIDTH * scale)
-WIN_HEIGHT = int(USER_SCREEN_HEIGHT * scale)
+scale = 66 # % of the screen dimensions
 
 # Initial cell size
 # These sizes will be adjusted, if necessary, so that a whole number of cells can be contained within surface
@@ -31,40 +15,107 @@ CELL_HEIGHT_INIT = 10
 # Margin between two cells (px).
 MARGIN = 2
 
-# Calculation of the integer number of cells that can be contained in the surface according to the initial parameters.
-cells_in_row_init = int(WIN_WIDTH // (CELL_WIDTH_INIT + MARGIN))
-cells_in_col_init = int(WIN_HEIGHT // (CELL_HEIGHT_INIT + MARGIN))
-
-# Calculation of total grid size based on initial parameters.
-grid_width_init = (cells_in_row_init * (CELL_WIDTH_INIT + MARGIN)) + MARGIN
-grid_height_init = (cells_in_col_init * (CELL_HEIGHT_INIT + MARGIN)) + MARGIN
-
-CELL_WIDTH = CELL_WIDTH_INIT
-CELL_HEIGHT = CELL_HEIGHT_INIT
-
-# Checks that the grid size doesn't exceed that of the desired window size.
-if grid_width_init > WIN_WIDTH or grid_height_init > WIN_HEIGHT:
-    width_ratio = WIN_WIDTH / grid_width_init if grid_width_init > WIN_WIDTH else 1.0
-    height_ratio = WIN_HEIGHT / grid_height_init if grid_height_init > WIN_HEIGHT else 1.0
-    scale_ratio = min(width_ratio, height_ratio)
-
-    CELL_WIDTH = int(CELL_WIDTH_INIT * scale_ratio)
-    CELL_HEIGHT = int(CELL_HEIGHT_INIT * scale_ratio)
-
-    if CELL_WIDTH < 1:  # Ensure cell width is at least 1px
-        CELL_WIDTH = 1
-
-    if CELL_HEIGHT < 1:  # Ensure cell height is at least 1px
-        CELL_HEIGHT = 1
-
-    print(f"Cell size adjusted from {CELL_WIDTH_INIT}x{CELL_HEIGHT_INIT} to {CELL_WIDTH}x{CELL_HEIGHT}")
-
-# Adjusting the number of cells per row/column
-cells_in_row = int(WIN_WIDTH // (CELL_WIDTH + MARGIN))
-cells_in_col = int(WIN_HEIGHT // (CELL_HEIGHT + MARGIN))
-print(f"Cells : {cells_in_row}x{cells_in_col} = {cells_in_row*cells_in_col}")
-
-# Applying window dimensions
-WINDOW_SIZE = [WIN_WIDTH, WIN_HEIGHT]
-
-screen = pygame.display.set_mode(WINDOW_SIZE)
\ No newline at end of file
+def compute_grid_layout(user_screen_width, user_screen_height, cell_width_init=CELL_WIDTH_INIT,
+                        cell_height_init=CELL_HEIGHT_INIT, margin=MARGIN, scale=scale) -> tuple:
+    """
+    Computes the dimensions of the window and of the grid of cells it contains from the dimensions of the screen.
+
+    This function doesn't call pygame, so the layout can be computed without initializing the display.
+
+    Args:
+        user_screen_width (int): Width of the user's screen (px).
+        user_screen_height (int): Height of the user's screen (px).
+        cell_width_init (int): Initial width of a cell (px).
+        cell_height_init (int): Initial height of a cell (px).
+        margin (int): Margin between two cells (px).
+        scale (int): Dimensions of the window, as a percentage of the dimensions of the screen.
+
+    Returns:
+        tuple: The width and height of a cell, the number of cells per row and per column, and the width and height
+        of the window.
+    """
+    # Sizing the window to the desired scale
+    # Integer arithmetic keeps the window dimensions integers, as required by pygame, without going through floats.
+    win_width = user_screen_width * scale // 100
+    win_height = user_screen_height * scale // 100
+
+    # Space taken by a cell and its margin (px)
+    cell_pitch_width = cell_width_init + margin
+    cell_pitch_height = cell_height_init + margin
+
+    # Calculation of the integer number of cells that can be contained in the surface according to the initial
+    # parameters. All the dimensions are integers, so the floor division gives integers.
+    cells_in_row_init = win_width // cell_pitch_width
+    cells_in_col_init = win_height // cell_pitch_height
+
+    # Calculation of total grid size based on initial parameters.
+    grid_width_init = (cells_in_row_init * cell_pitch_width) + margin
+    grid_height_init = (cells_in_col_init * cell_pitch_height) + margin
+
+    cell_width = cell_width_init
+    cell_height = cell_height_init
+
+    # Checks that the grid size doesn't exceed that of the desired window size.
+    if grid_width_init > win_width or grid_height_init > win_height:
+        width_ratio = win_width / grid_width_init if grid_width_init > win_width else 1.0
+        height_ratio = win_height / grid_height_init if grid_height_init > win_height else 1.0
+        scale_ratio = min(width_ratio, height_ratio)
+
+        cell_width = int(cell_width_init * scale_ratio)
+        cell_height = int(cell_height_init * scale_ratio)
+
+        if cell_width < 1:  # Ensure cell width is at least 1px
+            cell_width = 1
+
+        if cell_height < 1:  # Ensure cell height is at least 1px
+            cell_height = 1
+
+        print(f"Cell size adjusted from {cell_width_init}x{cell_height_init} to {cell_width}x{cell_height}")
+
+    # Adjusting the number of cells per row/column
+    cells_in_row = win_width // (cell_width + margin)
+    cells_in_col = win_height // (cell_height + margin)
+
+    return cell_width, cell_height, cells_in_row, cells_in_col, win_width, win_height
+
+def get_layout() -> tuple:
+    """
+    Computes the dimensions of the window and of the grid of cells it contains from the dimensions of the user's screen.
+
+    Only the display module of pygame is initialized to recover the screen dimensions, the rest of pygame and the
+    window are initialized by `init_display`. Importing this module doesn't initialize anything, so that the modules
+    using its constants (e.g. the physics, in the tests) don't depend on a display.
+
+    Returns:
+        tuple: The width and height of a cell, the number of cells per row and per column, and the width and height
+        of the window, see `compute_grid_layout`.
+    """
+    # Recovering screen dimensions.
+    pygame.display.init()
+    user_screen_info = pygame.display.Info()
+
+    layout = compute_grid_layout(user_screen_info.current_w, user_screen_info.current_h)
+    _, _, cells_in_row, cells_in_col, _, _ = layout
+    print(f"Cells : {cells_in_row}x{cells_in_col} = {cells_in_row*cells_in_col}")
+
+    return layout
+
+def init_display(window_size) -> pygame.Surface:
+    """
+    Initializes pygame and opens the simulation window.
+
+    Args:
+        window_size (tuple[int, int]): Width and height of the window (px), see `get_layout`.
+
+    Returns:
+        pygame.Surface: The surface of the window.
+    """
+    pygame.init()
+
+    # Favicon
+    # Only decoded when the window is opened. It isn't converted to the display format: the icon must be set before
+    # the window is opened, and it's never blitted.
+    favicon = pygame.image.load("assets/favicon.png")
+    pygame.display.set_icon(favicon)
+
+    return pygame.display.set_mode(window_size)
@@ -1,26 +1,73 @@
 import unittest
 
 import numpy as np
+import pygame
 
+from src.colors import Colors
+from src.grid import Grid, MATERIALS, STATE_BURNING, STATE_BURNED
 from src.material import Material
-from src.physics import heat_conduction, update_ignition, update_combustion
+from src.renderer import GridRenderer
+from src.window_option import MARGIN
+from src.physics import heat_conduction, heat_conduction_tiled, active_region, update_ignition, update_combustion
 from src.physics import (MIN_TEMP, MAX_TEMP, MEGAJOULES_TO_JOULES, KILOJOULES_TO_JOULES, OXYGEN_CONSUMPTION_FACTOR,
-                         MIN_OXYGEN_RATE)
+                         MIN_OXYGEN_RATE, CONTACT_AREA, CELL_DISTANCE)
+
+# Mask of the central cell of a 3x3 grid.
+CENTRAL_CELL = np.zeros((3, 3), dtype=bool)
+CENTRAL_CELL[1, 1] = True
+
+def random_conduction_grids(rng, shape, min_temp=MIN_TEMP, max_temp=1500.0):
+    """
+    Draws random float32 temperature, conductivity and capacity grids for the heat conduction tests.
+
+    Unlike uniform grids, where all the temperature differences are zero, every cell exchanges heat with its
+    neighbors, as in the simulation. The conductivities and capacities cover the range of those of the materials.
+    """
+    temp_grid = rng.uniform(min_temp, max_temp, shape).astype(np.float32)
+    conductivity_grid = rng.uniform(0.05, 0.6, shape).astype(np.float32)
+    capacity_grid = rng.uniform(1.0, 4.5, shape).astype(np.float32)
+
+    return temp_grid, conductivity_grid, capacity_grid
+
+def heat_conduction_reference(temp_grid, conductivity_grid, capacity_grid, delta_time):
+    """
+    Straightforward cell by cell implementation of the heat conduction, used as a reference for `heat_conduction`.
+
+    The heat exchanged by each pair of neighbors is computed from the temperatures before conduction, in double
+    precision.
+    """
+    rows, cols = temp_grid.shape
+    updated_grid = temp_grid.astype(np.float64)
+
+    for row in range(rows):
+        for col in range(cols):
+            # Right and bottom neighbors of the cell
+            for neighbor in ((row, col + 1), (row + 1, col)):
+                if neighbor[0] >= rows or neighbor[1] >= cols:
+                    continue
+                conductivity = (float(conductivity_grid[row, col]) + float(conductivity_grid[neighbor])) / 2
+                delta_temp = float(temp_grid[row, col]) - float(temp_grid[neighbor])
+                heat_transfer = conductivity * delta_temp * CONTACT_AREA / CELL_DISTANCE * delta_time
+                updated_grid[row, col] -= heat_transfer / float(capacity_grid[row, col])
+                updated_grid[neighbor] += heat_transfer / float(capacity_grid[neighbor])
+
+    return np.clip(updated_grid, MIN_TEMP, MAX_TEMP)
 
 class TestHeatConduction(unittest.TestCase):
     def test_heat_conduction_no_transfer(self):
         """
         Test that heat conduction does not occur when all cells have the same temperature.
         """
-        temp_grid = np.full((3, 3), 50.0)  # All cells at 50°C
-        conductivity_grid = np.full((3, 3), 0.5)
-        capacity_grid = np.full((3, 3), 1.0)
+        temp_grid = np.full((3, 3), 50.0, dtype=np.float32)  # All cells at 50°C
+        conductivity_grid = np.full((3, 3), 0.5, dtype=np.float32)
+        capacity_grid = np.full((3, 3), 1.0, dtype=np.float32)
         delta_time = 0.1
 
-        expected_grid = np.full((3, 3), 50.0) # No change expected
+        expected_grid = np.full((3, 3), 50.0, dtype=np.float32) # No change expected
 
-        updated_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+        updated_grid = heat_conduction(temp_grid, conductivity_grid, capacity_grid, delta_time)
 
+        self.assertIs(updated_grid, temp_grid) # Updated in place
         np.testing.assert_array_equal(updated_grid, expected_grid)
 
     def test_heat_conduction_transfer_high_to_low(self):
@@ -33,22 +80,22 @@ class TestHeatConduction(unittest.TestCase):
             [100.0, 50.0, 50.0],
             [50.0, 50.0, 50.0],
             [50.0, 50.0, 50.0]
-        ])
-        conductivity_grid = np.full((3, 3), 0.5)
-        capacity_grid = np.full((3, 3), 1.0)
+        ], dtype=np.float32)
+        conductivity_grid = np.full((3, 3), 0.5, dtype=np.float32)
+        capacity_grid = np.full((3, 3), 1.0, dtype=np.float32)
         delta_time = 0.1
 
         original_temp_grid = temp_grid.copy()  # Keep a copy of the original temperature for comparison
-        updated_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+        updated_grid = heat_conduction(temp_grid, conductivity_grid, capacity_grid, delta_time)
 
         # Check if the temperature of the hottest cell decreased.
-        self.assertLess(float(updated_grid[0, 0]), float(original_temp_grid[0, 0]))
+        np.testing.assert_array_less(updated_grid[0, 0], original_temp_grid[0, 0])
 
         # Check if the temperature of its right neighbor increased.
-        self.assertGreater(float(updated_grid[0, 1]), float(original_temp_grid[0, 1]))
+        np.testing.assert_array_less(original_temp_grid[0, 1], updated_grid[0, 1])
 
         # Check if the temperature of its bottom neighbor increased.
-        self.assertGreater(float(updated_grid[1, 0]), float(original_temp_grid[1, 0]))
+        np.testing.assert_array_less(original_temp_grid[1, 0], updated_grid[1, 0])
 
     def test_heat_conduction_min_temp(self):
         """
@@ -59,17 +106,15 @@ class TestHeatConduction(unittest.TestCase):
             [30.0, 10.0, 10.0],
             [10.0, 10.0, 10.0],
             [10.0, 10.0, 10.0]
-        ])
-        conductivity_grid = np.full((3, 3), 0.5)
-        capacity_grid = np.full((3, 3), 1.0)
+        ], dtype=np.float32)
+        conductivity_grid = np.full((3, 3), 0.5, dtype=np.float32)
+        capacity_grid = np.full((3, 3), 1.0, dtype=np.float32)
         delta_time = 1.0
 
-        updated_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+        updated_grid = heat_conduction(temp_grid, conductivity_grid, capacity_grid, delta_time)
 
         # Check if any cell has a temperature below the minimum.
-        for row in updated_grid:
-            for temp in row:
-                self.assertGreaterEqual(temp, min_temp)
+        self.assertTrue(np.all(updated_grid >= min_temp))
 
     def test_heat_conduction_max_temp(self):
         """
@@ -80,17 +125,227 @@ class TestHeatConduction(unittest.TestCase):
             [100.0, 8000.0, 8000.0],
             [8000, 8000.0, 8000.0],
             [8000.0, 8000.0, 8000.0]
-        ])
-        conductivity_grid = np.full((3, 3), 0.5)
-        capacity_grid = np.full((3, 3), 1.0)
+        ], dtype=np.float32)
+        conductivity_grid = np.full((3, 3), 0.5, dtype=np.float32)
+        capacity_grid = np.full((3, 3), 1.0, dtype=np.float32)
         delta_time = 1.0
 
-        updated_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+        updated_grid = heat_conduction(temp_grid, conductivity_grid, capacity_grid, delta_time)
 
         # Check if any cell has a temperature below the minimum.
-        for row in updated_grid:
-            for temp in row:
-                self.assertLessEqual(temp, max_temp)
+        self.assertTrue(np.all(updated_grid <= max_temp))
+
+    def test_heat_conduction_grid_sizes(self):
+        """
+        Test heat conduction on grids of realistic sizes: the heat given by the cells is received by their neighbors,
+        so the total heat of the grid is conserved.
+        """
+        rng = np.random.default_rng(0)
+        delta_time = 0.1
+
+        for shape in [(3, 3), (64, 64), (512, 512)]:
+            with self.subTest(shape=shape):
+                # Temperatures far enough from MIN_TEMP and MAX_TEMP for the clamping to have no effect.
+                temp_grid, conductivity_grid, capacity_grid = random_conduction_grids(rng, shape, 200.0, 1000.0)
+
+                updated_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+
+                self.assertEqual(updated_grid.shape, shape)
+                self.assertEqual(updated_grid.dtype, np.float32) # No upcast to float64
+                self.assertFalse(np.array_equal(updated_grid, temp_grid))
+                # Total heat (temperature times capacity), summed in double precision.
+                heat_before = np.sum(temp_grid * capacity_grid, dtype=np.float64)
+                heat_after = np.sum(updated_grid * capacity_grid, dtype=np.float64)
+                np.testing.assert_allclose(heat_after, heat_before, rtol=5e-6)
+
+    def test_heat_conduction_matches_reference(self):
+        """
+        Test that the vectorized heat conduction gives the same temperatures as the cell by cell reference.
+        """
+        rng = np.random.default_rng(0)
+        shape = (24, 32)
+        temp_grid, conductivity_grid, capacity_grid = random_conduction_grids(rng, shape)
+        delta_time = 0.02
+
+        updated_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+        expected_grid = heat_conduction_reference(temp_grid, conductivity_grid, capacity_grid, delta_time)
+
+        np.testing.assert_allclose(updated_grid, expected_grid, rtol=1e-5)
+
+    def test_heat_conduction_tiled(self):
+        """
+        Test that the heat conduction computed tile by tile gives exactly the same temperatures as the heat conduction
+        computed on the whole grid, including at the borders of the tiles.
+        """
+        rng = np.random.default_rng(0)
+        shape = (1024, 1024)
+        temp_grid, conductivity_grid, capacity_grid = random_conduction_grids(rng, shape)
+        delta_time = 0.02
+
+        expected_grid = heat_conduction(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time)
+
+        # Square tiles, the default tiles, and tiles that don't divide the grid.
+        for tile_shape in [(64, 64), (128, 512), (100, 300)]:
+            with self.subTest(tile_shape=tile_shape):
+                updated_grid = heat_conduction_tiled(temp_grid.copy(), conductivity_grid, capacity_grid, delta_time,
+                                                     tile_shape=tile_shape)
+                np.testing.assert_array_equal(updated_grid, expected_grid)
+
+class TestActiveRegion(unittest.TestCase):
+    def test_active_region_ambient_grid(self):
+        """
+        Test that there is no active region when all the cells are at the ambient temperature and none is burning.
+        """
+        temp_grid = np.full((5, 6), MIN_TEMP, dtype=np.float32)
+        is_burning_grid = np.zeros((5, 6), dtype=bool)
+
+        self.assertIsNone(active_region(temp_grid))
+        self.assertIsNone(active_region(temp_grid, is_burning_grid))
+
+    def test_active_region_single_hot_cell(self):
+        """
+        Test that the active region of a single hot cell inside the grid is the cell and its 8 neighbors.
+        """
+        temp_grid = np.full((5, 6), MIN_TEMP, dtype=np.float32)
+        temp_grid[2, 3] = 500.0
+
+        self.assertEqual(active_region(temp_grid), (slice(1, 4), slice(2, 5)))
+
+    def test_active_region_clamped(self):
+        """
+        Test that the active region doesn't go past the edges of the grid when the hot cells are on its edges.
+        """
+        temp_grid = np.full((5, 6), MIN_TEMP, dtype=np.float32)
+        temp_grid[0, 0] = 500.0
+        temp_grid[4, 5] = 500.0
+        self.assertEqual(active_region(temp_grid), (slice(0, 5), slice(0, 6)))
+
+        temp_grid = np.full((5, 6), MIN_TEMP, dtype=np.float32)
+        temp_grid[4, 0] = 500.0
+        self.assertEqual(active_region(temp_grid), (slice(3, 5), slice(0, 2)))
+
+    def test_active_region_burning_cells(self):
+        """
+        Test that the burning cells are in the active region even when they are at the ambient temperature.
+        """
+        temp_grid = np.full((5, 6), MIN_TEMP, dtype=np.float32)
+        temp_grid[1, 1] = 500.0
+        is_burning_grid = np.zeros((5, 6), dtype=bool)
+        is_burning_grid[3, 4] = True
+
+        self.assertEqual(active_region(temp_grid), (slice(0, 3), slice(0, 3)))
+        self.assertEqual(active_region(temp_grid, is_burning_grid), (slice(0, 5), slice(0, 6)))
+
+class TestGridStep(unittest.TestCase):
+    def test_step_matches_full_grid(self):
+        """
+        Test that stepping the grid, which only computes the thermal reactions on the active region, gives exactly the
+        same state as the thermal reactions computed on the whole grid.
+        """
+        np.random.seed(0)
+        grid = Grid(40, 60)
+        delta_time = 0.05
+        steps = 60
+
+        # Copies of the state matrices, updated by the reactions computed on the whole grid
+        temp_grid = grid.temp_grid.copy()
+        fuel_grid = grid.fuel_grid.copy()
+        oxygen_grid = grid.oxygen_grid.copy()
+        is_burning_grid = grid.is_burning_grid.copy()
+        burned_grid = grid.burned_grid.copy()
+        manual_ignition_expiration_grid = grid.manual_ignition_expiration_grid.copy()
+
+        # Manual ignition of a cell for the first half of the steps
+        expiration = steps // 2 * 20
+        grid.ignite(20, 30, expiration)
+        manual_ignition_expiration_grid[20, 30] = expiration
+
+        for step in range(steps):
+            now = step * 20 # ms
+            grid.step(delta_time, now)
+
+            manual_ignition_mask = manual_ignition_expiration_grid > now
+            np.copyto(temp_grid, MAX_TEMP, where=manual_ignition_mask)
+            heat_conduction(temp_grid, grid.conductivity_grid, grid.capacity_grid, delta_time,
+                            grid.interface_conductivity_grids, grid.inverse_capacity_grid)
+            is_burning_grid = update_ignition(temp_grid, grid.ignition_temp_grid, grid.humidity_grid, burned_grid)
+            temp_grid, fuel_grid, oxygen_grid, is_burning_grid, burned_grid = update_combustion(
+                temp_grid, fuel_grid, oxygen_grid, is_burning_grid, grid.burn_rate_grid, grid.combustion_heat_grid,
+                grid.density_grid, grid.capacity_grid, delta_time)
+            manual_ignition_expiration_grid *= manual_ignition_mask
+
+        # The fire must have spread, and the heat must not have reached the edges of the grid, so that the active
+        # region is smaller than the grid.
+        self.assertGreater(np.count_nonzero(is_burning_grid | burned_grid), 1)
+        rows, cols = active_region(temp_grid, is_burning_grid)
+        self.assertGreater(rows.start, 0)
+        self.assertLess(cols.stop, grid.cols)
+
+        np.testing.assert_array_equal(grid.temp_grid, temp_grid)
+        np.testing.assert_array_equal(grid.fuel_grid, fuel_grid)
+        np.testing.assert_array_equal(grid.oxygen_grid, oxygen_grid)
+        np.testing.assert_array_equal(grid.is_burning_grid, is_burning_grid)
+        np.testing.assert_array_equal(grid.burned_grid, burned_grid)
+        np.testing.assert_array_equal(grid.manual_ignition_expiration_grid, manual_ignition_expiration_grid)
+
+class TestStateGrid(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # A grid with a burning cell and a burned cell, the other cells being intact.
+        cls.grid = Grid(4, 5)
+        cls.grid.is_burning_grid[1, 2] = True
+        cls.grid.burned_grid[3, 4] = True
+        cls.grid.update_state_grid()
+
+    def test_update_state_grid(self):
+        """
+        Test that the state of each cell packs its material index and its burning and burned flags.
+        """
+        grid = self.grid
+        expected_state_grid = grid.material_grid.copy()
+        expected_state_grid[1, 2] |= STATE_BURNING
+        expected_state_grid[3, 4] |= STATE_BURNED
+
+        np.testing.assert_array_equal(grid.state_grid, expected_state_grid)
+
+        # The material index is kept in the lowest bits of the states.
+        np.testing.assert_array_equal(grid.state_grid & (STATE_BURNING - 1), grid.material_grid)
+
+    def test_update_state_grid_region(self):
+        """
+        Test that only the cells of the given region are updated.
+        """
+        grid = Grid(4, 5)
+        grid.is_burning_grid[:] = True
+        grid.update_state_grid((slice(0, 2), slice(1, 3)))
+
+        expected_state_grid = grid.material_grid.copy()
+        expected_state_grid[0:2, 1:3] |= STATE_BURNING
+        np.testing.assert_array_equal(grid.state_grid, expected_state_grid)
+
+    def test_palette(self):
+        """
+        Test that the colors looked up in the palette of the renderer from the cell states are the material colors of
+        the intact cells, black for the burned cells and red for the burning cells.
+        """
+        grid = self.grid
+        colors = Colors()
+        surface_size = (grid.cols * (MARGIN + grid.cell_width) + MARGIN,
+                        grid.rows * (MARGIN + grid.cell_height) + MARGIN)
+        renderer = GridRenderer(grid, pygame.Surface(surface_size))
+
+        color_grid = renderer.palette[grid.state_grid]
+
+        for row in range(grid.rows):
+            for col in range(grid.cols):
+                if (row, col) == (1, 2):
+                    expected_color = colors.red
+                elif (row, col) == (3, 4):
+                    expected_color = colors.black
+                else:
+                    expected_color = MATERIALS[grid.material_grid[row, col]].value.color
+                with self.subTest(row=row, col=col):
+                    np.testing.assert_array_equal(color_grid[row, col], expected_color)
 
 class TestUpdateIgnition(unittest.TestCase):
     def test_ignition_no_humidity(self):
@@ -101,23 +356,18 @@ class TestUpdateIgnition(unittest.TestCase):
         # Create a 3x3 grid where the cell in the center is at the exact ignition temperature.
         # The humidity_grid is all zeros (no humidity).
         ignition_temp = 300.0
-        temperature_grid = np.full((3, 3), ignition_temp - 10)
+        temperature_grid = np.full((3, 3), ignition_temp - 10, dtype=np.float32)
         temperature_grid[1, 1] = ignition_temp
-        ignition_temp_grid = np.full((3, 3), ignition_temp)
-        humidity_grid = np.zeros((3, 3))
+        ignition_temp_grid = np.full((3, 3), ignition_temp, dtype=np.float32)
+        humidity_grid = np.zeros((3, 3), dtype=np.float32)
         burned_grid = np.zeros((3, 3), dtype=bool)
 
         # Call the function:
         is_burning_grid = update_ignition(temperature_grid.copy(), ignition_temp_grid, humidity_grid, burned_grid)
 
         # Assertions:
-        # The cell in the center should be burning (True).
-        self.assertTrue(is_burning_grid[1, 1])
-        # All other cells should not be burning (False).
-        for i in range(3):
-            for j in range(3):
-                if i != 1 or j != 1:
-                    self.assertFalse(is_burning_grid[i, j])
+        # The cell in the center should be burning (True) and all other cells should not be burning (False).
+        np.testing.assert_array_equal(is_burning_grid, CENTRAL_CELL)
 
     def test_ignition_with_humidity(self):
         """
@@ -127,9 +377,9 @@ class TestUpdateIgnition(unittest.TestCase):
         # Create a 3x3 grid where the cell in the center is at the base ignition temperature.
         # The humidity_grid has a value of 50.0 for all cells.
         ignition_temp = 300.0
-        temperature_grid = np.full((3, 3), ignition_temp)
-        ignition_temp_grid = np.full((3, 3), ignition_temp)
-        humidity_grid = np.full((3, 3), 50.0)
+        temperature_grid = np.full((3, 3), ignition_temp, dtype=np.float32)
+        ignition_temp_grid = np.full((3, 3), ignition_temp, dtype=np.float32)
+        humidity_grid = np.full((3, 3), 50.0, dtype=np.float32)
         burned_grid = np.zeros((3, 3), dtype=bool)
 
         # Call the function:
@@ -140,9 +390,7 @@ class TestUpdateIgnition(unittest.TestCase):
         # The temperatures of all cells are equal to the ignition temperature, if all cells had a humidity value of
         # zero, they would be on fire, but their humidity value (set to 50) delays combustion, so no cell should be
         # on fire here.
-        for row in is_burning_grid:
-            for cell_burning in row:
-                self.assertFalse(cell_burning)
+        self.assertFalse(is_burning_grid.any())
 
         # Setup 2:
         # Add a temperature of 100° to the center cell.
@@ -153,13 +401,8 @@ class TestUpdateIgnition(unittest.TestCase):
         is_burning_grid = update_ignition(temperature_grid.copy(), ignition_temp_grid, humidity_grid, burned_grid)
 
         # Assertions:
-        # The cell in the center should be burning now.
-        self.assertTrue(is_burning_grid[1, 1])
-        # All other cells should not be burning.
-        for i in range(3):
-            for j in range(3):
-                if i != 1 or j != 1:
-                    self.assertFalse(is_burning_grid[i, j])
+        # The cell in the center should be burning now, and all other cells should not be burning.
+        np.testing.assert_array_equal(is_burning_grid, CENTRAL_CELL)
 
     def test_no_reignition_after_burning(self):
         """
@@ -168,9 +411,9 @@ class TestUpdateIgnition(unittest.TestCase):
         # Setup:
         # Create a 3x3 grid with a cell that has already burned.
         ignition_temp = 300.0
-        temperature_grid = np.full((3, 3), ignition_temp)
-        ignition_temp_grid = np.full((3, 3), ignition_temp)
-        humidity_grid = np.zeros((3, 3))
+        temperature_grid = np.full((3, 3), ignition_temp, dtype=np.float32)
+        ignition_temp_grid = np.full((3, 3), ignition_temp, dtype=np.float32)
+        humidity_grid = np.zeros((3, 3), dtype=np.float32)
         burned_grid = np.zeros((3, 3), dtype=bool)
         burned_grid[1, 1] = True # The central cell is burned
 
@@ -178,79 +421,108 @@ class TestUpdateIgnition(unittest.TestCase):
         is_burning_grid = update_ignition(temperature_grid.copy(), ignition_temp_grid, humidity_grid, burned_grid)
 
         # Assertions:
-        # The cell in the center should not ignite because it is burned.
-        self.assertFalse(is_burning_grid[1, 1])
+        # The cell in the center should not ignite because it is burned, and the other cells should be on fire.
+        np.testing.assert_array_equal(is_burning_grid, ~CENTRAL_CELL)
 
-       # The other cells should be on fire
-        for i in range(3):
-            for j in range(3):
-                if i != 1 or j != 1:
-                    self.assertTrue(is_burning_grid[i, j])
+    def test_ignition_out_view(self):
+        """
+        Test that the ignition is written in the array passed as 'out', even when it is a non-contiguous view of a
+        larger grid, and that this array is returned.
+        """
+        # Setup:
+        # The same 3x3 grid as in test_ignition_no_humidity, with the central cell at the ignition temperature. The
+        # result is written into one cell out of two of a 6x6 burning state matrix, in which every cell is burning.
+        ignition_temp = 300.0
+        temperature_grid = np.full((3, 3), ignition_temp - 10, dtype=np.float32)
+        temperature_grid[1, 1] = ignition_temp
+        ignition_temp_grid = np.full((3, 3), ignition_temp, dtype=np.float32)
+        humidity_grid = np.zeros((3, 3), dtype=np.float32)
+        burned_grid = np.zeros((3, 3), dtype=bool)
+        full_is_burning_grid = np.ones((6, 6), dtype=bool)
+        out = full_is_burning_grid[::2, ::2]
+        self.assertFalse(out.flags.c_contiguous)
+
+        # Call the function:
+        is_burning_grid = update_ignition(temperature_grid, ignition_temp_grid, humidity_grid, burned_grid, out=out)
+
+        # Assertions:
+        # The view is returned and only the central cell is burning in it. The cells of the matrix outside the view
+        # are left unchanged.
+        self.assertIs(is_burning_grid, out)
+        np.testing.assert_array_equal(out, CENTRAL_CELL)
+        expected_grid = np.ones((6, 6), dtype=bool)
+        expected_grid[::2, ::2] = CENTRAL_CELL
+        np.testing.assert_array_equal(full_is_burning_grid, expected_grid)
 
 class TestUpdateCombustion(unittest.TestCase):
-    def setUp(self):
-        self.cells_number = (3, 3)
-        self.delta_time = 0.1
-        self.fuel_start = 100.0
-        self.oxygen_start = 21.0
-        self.oxygen_consumption_factor = OXYGEN_CONSUMPTION_FACTOR
-        self.temp = 400.0
+    @classmethod
+    def setUpClass(cls):
+        cls.cells_number = (3, 3)
+        cls.delta_time = 0.1
+        cls.fuel_start = 100.0
+        cls.oxygen_start = 21.0
+        cls.oxygen_consumption_factor = OXYGEN_CONSUMPTION_FACTOR
+        cls.temp = 400.0
 
         # Material property values
-        self.test_material = Material.WOOD
-        self.burn_rate = self.test_material.value.burn_rate
-        self.combustion_heat = self.test_material.value.combustion_heat
-        self.density = self.test_material.value.density
-        self.thermal_capacity = self.test_material.value.thermal_capacity
+        cls.test_material = Material.WOOD
+        cls.burn_rate = cls.test_material.value.burn_rate
+        cls.combustion_heat = cls.test_material.value.combustion_heat
+        cls.density = cls.test_material.value.density
+        cls.thermal_capacity = cls.test_material.value.thermal_capacity
 
         # Material property grids
-        self.fuel_grid = np.full(self.cells_number, self.fuel_start)
-        self.oxygen_grid = np.full(self.cells_number, 21.0)
-        self.temperature_grid = np.full(self.cells_number, self.temp)
-        self.burn_rate_grid = np.full(self.cells_number, self.burn_rate)
-        self.combustion_heat_grid = np.full(self.cells_number, self.combustion_heat)
-        self.density_grid = np.full(self.cells_number, self.density)
-        self.thermal_capacity_grid = np.full(self.cells_number, self.thermal_capacity)
+        cls.fuel_grid = np.full(cls.cells_number, cls.fuel_start, dtype=np.float32)
+        cls.oxygen_grid = np.full(cls.cells_number, 21.0, dtype=np.float32)
+        cls.temperature_grid = np.full(cls.cells_number, cls.temp, dtype=np.float32)
+        cls.burn_rate_grid = np.full(cls.cells_number, cls.burn_rate, dtype=np.float32)
+        cls.combustion_heat_grid = np.full(cls.cells_number, cls.combustion_heat, dtype=np.float32)
+        cls.density_grid = np.full(cls.cells_number, cls.density, dtype=np.float32)
+        cls.thermal_capacity_grid = np.full(cls.cells_number, cls.thermal_capacity, dtype=np.float32)
+
+        # The grids are built once for all the tests and are read-only: the tests pass a copy of the grids that
+        # update_combustion updates in place, and the property grids themselves, which it must not modify.
+        for grid in (cls.fuel_grid, cls.oxygen_grid, cls.temperature_grid, cls.burn_rate_grid, cls.combustion_heat_grid,
+                     cls.density_grid, cls.thermal_capacity_grid):
+            grid.flags.writeable = False
+
+        # Combustion with only the central cell burning
+        # The fuel, heat and oxygen tests check different results of the same call, which is only made once.
+        cls.is_burning_grid = np.zeros(cls.cells_number, dtype=bool)
+        cls.is_burning_grid[1, 1] = True
+        cls.is_burning_grid.flags.writeable = False
+        cls.combustion_results = update_combustion(cls.temperature_grid.copy(), cls.fuel_grid.copy(),
+                                                   cls.oxygen_grid.copy(), cls.is_burning_grid.copy(),
+                                                   cls.burn_rate_grid, cls.combustion_heat_grid, cls.density_grid,
+                                                   cls.thermal_capacity_grid, cls.delta_time)
 
     def test_fuel_consumption(self):
         """Test that burning cells consume fuel correctly."""
-        is_burning_grid = np.array([
-            [False, False, False],
-            [False, True, False],
-            [False, False, False]
-        ])
+        is_burning_grid = self.is_burning_grid # Only the central cell is burning
 
         # Expected fuel consumption
         fuel_consumed_expected = self.burn_rate * self.delta_time
 
-        # Execution
-        _, updated_fuel_grid, _, _, _ = update_combustion(self.temperature_grid.copy(), self.fuel_grid.copy(),
-                                                          self.oxygen_grid.copy(), is_burning_grid.copy(),
-                                                          self.burn_rate_grid, self.combustion_heat_grid,
-                                                          self.density_grid, self.thermal_capacity_grid,
-                                                          self.delta_time)
+        # Execution, see setUpClass
+        updated_fuel_grid = self.combustion_results[1]
 
         # Assertions
-        # Check fuel consumption in burning cell.
-        self.assertAlmostEqual(updated_fuel_grid[1, 1], self.fuel_start - fuel_consumed_expected)
+        # Check fuel consumption in the whole grid, only the burning cell consumes fuel.
+        expected_fuel_grid = self.fuel_grid - is_burning_grid * fuel_consumed_expected
+        np.testing.assert_allclose(updated_fuel_grid, expected_fuel_grid, rtol=1e-5)
 
         # Check fuel consumption in non-burning cells.
-        self.assertEqual(updated_fuel_grid[0, 0], self.fuel_start)
+        not_burning = ~is_burning_grid
+        np.testing.assert_array_equal(updated_fuel_grid[not_burning], self.fuel_grid[not_burning])
 
         # Check that no cell has negative fuel
-        for row in updated_fuel_grid:
-            for fuel in row:
-                self.assertGreaterEqual(fuel, 0.0)
+        self.assertTrue(np.all(updated_fuel_grid >= 0.0))
 
     def test_heat_generation(self):
         """Test that burning cells generate heat correctly."""
         cell_volume = 1.0
 
-        is_burning_grid = np.array([
-            [False, False, False],
-            [False, True, False],
-            [False, False, False]
-        ])
+        is_burning_grid = self.is_burning_grid # Only the central cell is burning
 
         # Expected fuel consumption
         fuel_consumed_expected = self.burn_rate * self.delta_time
@@ -260,56 +532,44 @@ class TestUpdateCombustion(unittest.TestCase):
         # Expected temperature delta
         delta_temp_expected = heat_generated_expected / (cell_mass * self.thermal_capacity * KILOJOULES_TO_JOULES)
 
-        # Execution
-        updated_temperature_grid, _, _, _, _ = update_combustion(self.temperature_grid.copy(), self.fuel_grid.copy(),
-                                                                 self.oxygen_grid.copy(), is_burning_grid.copy(),
-                                                                 self.burn_rate_grid, self.combustion_heat_grid,
-                                                                 self.density_grid, self.thermal_capacity_grid,
-                                                                 self.delta_time)
+        # Execution, see setUpClass
+        updated_temperature_grid = self.combustion_results[0]
 
         # Assertions
-        # Check temperature increase in burning cell
-        self.assertAlmostEqual(updated_temperature_grid[1, 1], self.temp + delta_temp_expected)
+        # Check temperature in the whole grid, only the burning cell heats up
+        expected_temperature_grid = self.temperature_grid + is_burning_grid * delta_temp_expected
+        np.testing.assert_allclose(updated_temperature_grid, expected_temperature_grid, rtol=1e-5)
 
         # Check temperature in non-burning cells
-        self.assertEqual(updated_temperature_grid[0, 0], self.temp)
+        not_burning = ~is_burning_grid
+        np.testing.assert_array_equal(updated_temperature_grid[not_burning], self.temperature_grid[not_burning])
 
         # Check that no cell exceed MAX_TEMP
-        for row in updated_temperature_grid:
-            for temp in row:
-                self.assertLessEqual(temp, MAX_TEMP)
+        self.assertTrue(np.all(updated_temperature_grid <= MAX_TEMP))
 
     def test_oxygen_consumption(self):
         """Test that burning cells consume oxygen correctly."""
-        is_burning_grid = np.array([
-            [False, False, False],
-            [False, True, False],
-            [False, False, False]
-        ])
+        is_burning_grid = self.is_burning_grid # Only the central cell is burning
 
         # Expected fuel consumption
         fuel_consumed_expected = self.burn_rate * self.delta_time
         # Expected oxygen consumption
         oxygen_consumed_expected = fuel_consumed_expected * self.oxygen_consumption_factor * self.delta_time
 
-        # Execution
-        _, _, updated_oxygen_grid, _, _ = update_combustion(self.temperature_grid.copy(), self.fuel_grid.copy(),
-                                                            self.oxygen_grid.copy(), is_burning_grid.copy(),
-                                                            self.burn_rate_grid, self.combustion_heat_grid,
-                                                            self.density_grid, self.thermal_capacity_grid,
-                                                            self.delta_time)
+        # Execution, see setUpClass
+        updated_oxygen_grid = self.combustion_results[2]
 
         # Assertions
-        # Check oxygen consumption in burning cell
-        self.assertAlmostEqual(updated_oxygen_grid[1, 1], self.oxygen_start - oxygen_consumed_expected)
+        # Check oxygen consumption in the whole grid, only the burning cell consumes oxygen
+        expected_oxygen_grid = self.oxygen_grid - is_burning_grid * oxygen_consumed_expected
+        np.testing.assert_allclose(updated_oxygen_grid, expected_oxygen_grid, rtol=1e-5)
 
         # Check oxygen in non-burning cells
-        self.assertEqual(updated_oxygen_grid[0, 0], self.oxygen_start)
+        not_burning = ~is_burning_grid
+        np.testing.assert_array_equal(updated_oxygen_grid[not_burning], self.oxygen_grid[not_burning])
 
         # Check that no cell has negative oxygen
-        for row in updated_oxygen_grid:
-            for oxygen in row:
-                self.assertGreaterEqual(oxygen, 0.0)
+        self.assertTrue(np.all(updated_oxygen_grid >= 0.0))
 
     def test_stop_burning_no_fuel(self):
         """Test that a cell stop burning when it does not have fuel anymore."""
@@ -317,7 +577,7 @@ class TestUpdateCombustion(unittest.TestCase):
             [100.0, 100.0, 100.0],
             [100.0, 0.0, 100.0],
             [100.0, 100.0, 100.0]
-        ])
+        ], dtype=np.float32)
 
         is_burning_grid = np.array([
             [True, True, True],
@@ -337,7 +597,7 @@ class TestUpdateCombustion(unittest.TestCase):
         self.assertFalse(updated_is_burning_grid[1, 1])
 
         # Check that cells that have fuel are still burning
-        self.assertTrue(updated_is_burning_grid[0, 0])
+        self.assertTrue(updated_is_burning_grid[~CENTRAL_CELL].all())
 
     def test_stop_burning_no_oxygen(self):
         """Test that a cell stop burning when it does not have enough oxygen anymore."""
@@ -347,7 +607,7 @@ class TestUpdateCombustion(unittest.TestCase):
             [21.0, 21.0, 21.0],
             [21.0, oxygen_limit, 21.0],
             [21.0, 21.0, 21.0]
-        ])
+        ], dtype=np.float32)
 
         is_burning_grid = np.array([
             [True, True, True],
@@ -367,7 +627,65 @@ class TestUpdateCombustion(unittest.TestCase):
         self.assertFalse(updated_is_burning_grid[1, 1])
 
         # Check that cells that have enough oxygen are still burning
-        self.assertTrue(updated_is_burning_grid[0, 0])
+        self.assertTrue(updated_is_burning_grid[~CENTRAL_CELL].all())
+
+    def test_burned_status(self):
+        """
+        Test the burned status of the cells, written in the array passed as 'burned_out', here a non-contiguous view
+        of a larger grid, which is returned.
+        """
+        # The first row is burning: a cell without fuel, a cell with enough fuel and oxygen and a cell without enough
+        # oxygen. The other rows aren't burning: a cell with just the minimum oxygen rate, a cell without fuel and cells
+        # with enough fuel and oxygen.
+        fuel_grid = np.array([
+            [0.0, 100.0, 100.0],
+            [100.0, 100.0, 100.0],
+            [100.0, 100.0, 0.0]
+        ], dtype=np.float32)
+
+        oxygen_grid = np.array([
+            [21.0, 21.0, MIN_OXYGEN_RATE - 1.0],
+            [MIN_OXYGEN_RATE, 21.0, 21.0],
+            [21.0, 21.0, 21.0]
+        ], dtype=np.float32)
+
+        is_burning_grid = np.array([
+            [True, True, True],
+            [False, False, False],
+            [False, False, False]
+        ])
+
+        # The burned status is written into one column out of two of a burned state matrix in which every cell is
+        # burned, so that the cells that aren't burned have to be written too.
+        full_burned_grid = np.ones((3, 6), dtype=bool)
+        burned_out = full_burned_grid[:, ::2]
+        self.assertFalse(burned_out.flags.c_contiguous)
+
+        # Execution
+        _, updated_fuel_grid, _, updated_is_burning_grid, burned_grid = update_combustion(
+            self.temperature_grid.copy(), fuel_grid, oxygen_grid, is_burning_grid, self.burn_rate_grid,
+            self.combustion_heat_grid, self.density_grid, self.thermal_capacity_grid, self.delta_time,
+            burned_out=burned_out)
+
+        # Assertions
+        # Only the burning cell with enough fuel and oxygen keeps burning.
+        expected_is_burning_grid = np.zeros(self.cells_number, dtype=bool)
+        expected_is_burning_grid[0, 1] = True
+        np.testing.assert_array_equal(updated_is_burning_grid, expected_is_burning_grid)
+
+        # The cells that stopped burning and the cells that aren't burning without enough fuel or oxygen are burned.
+        expected_burned_grid = np.array([
+            [True, False, True],
+            [True, False, False],
+            [False, False, True]
+        ])
+        self.assertIs(burned_grid, burned_out)
+        np.testing.assert_array_equal(burned_out, expected_burned_grid)
+        np.testing.assert_array_equal(full_burned_grid[:, 1::2], np.ones(self.cells_number, dtype=bool))
+
+        # The burned cells have no more fuel.
+        self.assertFalse(updated_fuel_grid[expected_burned_grid].any())
+        self.assertTrue((updated_fuel_grid[~expected_burned_grid] > 0).all())
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file